@@ -3,17 +3,56 @@
 #----------------------------------------------------------------------------#
 
 import json
+import hashlib
 import dateutil.parser
-import babel
-from flask import Flask, render_template, request, Response, flash, redirect, url_for, abort, jsonify
+from flask import Flask, render_template, request, Response, flash, redirect, url_for, abort, jsonify, stream_with_context
 from flask_moment import Moment
-from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from werkzeug.http import http_date
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 import logging
-from datetime import datetime
-from logging import Formatter, FileHandler
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
 from flask_wtf import Form
 from forms import *
+from enums import Genre, State
+from seed import generate_venues, generate_artists, generate_shows
+from cache import create_cache
+from importer import read_records, import_records, chunked
+from batch import validate_batch, update_from_values
+from matching import Matchmaker
+from exporter import EXPORT_FORMATS, write_parquet
+from formatting import format_datetime, format_datetimes, json_default
+from db_pool import render_pool_metrics
+from routing import RoutingSQLAlchemy, ReplicaSafeCache, read_only
+from profiler import QueryProfiler
+from logs import init_logging
+from templating import init_templates
+from assets import Assets, build_assets
+import click
+import random
+
+# SQLSTATE raised by the show booking exclusion constraints
+EXCLUSION_VIOLATION = '23P01'
+
+# View-models carry native datetimes, which are serialized in the same
+# ISO format the pages used to receive as strings.
+try:
+    import orjson
+
+    def dumps_json(data):
+        return orjson.dumps(
+            data,
+            default=json_default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME
+        ).decode()
+except ImportError:
+    def dumps_json(data):
+        return json.dumps(
+            data, default=json_default, separators=(',', ':'))
+
 #----------------------------------------------------------------------------#
 # App Config.
 #----------------------------------------------------------------------------#
@@ -21,7 +60,17 @@ from forms import *
 app = Flask(__name__)
 moment = Moment(app)
 app.config.from_object('config')
-db = SQLAlchemy(app)
+if not app.debug:
+    init_logging(app)
+db = RoutingSQLAlchemy(app)
+cache = create_cache(app.config)
+if app.config['SQLALCHEMY_REPLICA_BINDS']:
+    cache = ReplicaSafeCache(cache, app.config['READ_YOUR_WRITES_SECONDS'])
+# Facet counts are memoized per filter signature for a few seconds instead
+# of being evicted on writes, there are too many signatures to track.
+facet_cache = create_cache(dict(app.config, CACHE_TTL=app.config['FACET_CACHE_TTL']))
+QueryProfiler(app)
+assets = Assets(app)
 
 migrate = Migrate(app, db)
 
@@ -32,6 +81,17 @@ migrate = Migrate(app, db)
 
 class Venue(db.Model):
     __tablename__ = 'Venue'
+    __table_args__ = (
+        db.Index('ix_Venue_city_state', 'city', 'state'),
+        # Venue directory order over the live (not soft-deleted) rows
+        db.Index('ix_Venue_active_city_state_name', 'city', 'state', 'name',
+                 postgresql_where=db.text('deleted_at IS NULL')),
+        db.Index('ix_Venue_genres', 'genres', postgresql_using='gin'),
+        db.Index('ix_Venue_name_trgm', 'name', postgresql_using='gin',
+                 postgresql_ops={'name': 'gin_trgm_ops'}),
+        db.Index('ix_Venue_city_trgm', 'city', postgresql_using='gin',
+                 postgresql_ops={'city': 'gin_trgm_ops'}),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
@@ -47,8 +107,30 @@ class Venue(db.Model):
     seeking_talent = db.Column(db.Boolean)
     seeking_description = db.Column(db.String(500))
 
+    # Maintained by the show_counters triggers on "Show", see the
+    # roll-over-shows command for moving passed shows to past_shows_count
+    total_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_show_time = db.Column(db.DateTime, index=True)
+    updated_at = db.Column(
+        db.DateTime, nullable=False, index=True,
+        default=datetime.utcnow, onupdate=datetime.utcnow,
+        server_default=db.text("(now() AT TIME ZONE 'utc')")
+    )
+    # Bumped by every ORM update, which only succeeds if the row still has
+    # the version that was loaded. Edits of a listing changed in the
+    # meantime fail instead of overwriting it (see edit_venue_submission).
+    version = db.Column(db.Integer, nullable=False, server_default='1')
+    __mapper_args__ = {'version_id_col': version}
+    # Set by a soft delete, listings and detail pages skip tombstoned rows
+    deleted_at = db.Column(db.DateTime)
+
+    # Shows are removed by the ON DELETE CASCADE foreign key, deleting a
+    # venue never loads its show history into the session
     shows = db.relationship(
-        'Show', backref='venue', cascade='all,delete,delete-orphan')
+        'Show', backref='venue', cascade='all, delete-orphan',
+        passive_deletes=True)
 
     def __repr__(self):
         return f'<Venue {self.id} {self.name}>'
@@ -56,6 +138,15 @@ class Venue(db.Model):
 
 class Artist(db.Model):
     __tablename__ = 'Artist'
+    __table_args__ = (
+        db.Index('ix_Artist_genres', 'genres', postgresql_using='gin'),
+        db.Index('ix_Artist_active_id_name', 'id', 'name',
+                 postgresql_where=db.text('deleted_at IS NULL')),
+        db.Index('ix_Artist_name_trgm', 'name', postgresql_using='gin',
+                 postgresql_ops={'name': 'gin_trgm_ops'}),
+        db.Index('ix_Artist_city_trgm', 'city', postgresql_using='gin',
+                 postgresql_ops={'city': 'gin_trgm_ops'}),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
@@ -70,11 +161,35 @@ class Artist(db.Model):
     seeking_venue = db.Column(db.Boolean)
     seeking_description = db.Column(db.String(500))
 
-    shows = db.relationship('Show', backref='artist')
+    # Maintained by the show_counters triggers on "Show", see the
+    # roll-over-shows command for moving passed shows to past_shows_count
+    total_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_show_time = db.Column(db.DateTime, index=True)
+    updated_at = db.Column(
+        db.DateTime, nullable=False, index=True,
+        default=datetime.utcnow, onupdate=datetime.utcnow,
+        server_default=db.text("(now() AT TIME ZONE 'utc')")
+    )
+    version = db.Column(db.Integer, nullable=False, server_default='1')
+    __mapper_args__ = {'version_id_col': version}
+    deleted_at = db.Column(db.DateTime)
+
+    shows = db.relationship(
+        'Show', backref='artist', cascade='all, delete-orphan',
+        passive_deletes=True)
 
 
 class Show(db.Model):
     __tablename__ = 'Show'
+    __table_args__ = (
+        db.Index('ix_Show_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_Show_artist_id_start_time', 'artist_id', 'start_time'),
+        db.Index('ix_Show_start_time_id', 'start_time', 'id'),
+        db.CheckConstraint('duration_minutes > 0',
+                           name='ck_Show_duration_minutes_positive'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     start_time = db.Column(db.DateTime, nullable=False)
@@ -88,47 +203,888 @@ class Show(db.Model):
         db.ForeignKey('Venue.id', ondelete='CASCADE'),
         nullable=False
     )
+    # A show books its venue and artist for [start_time, start_time +
+    # duration). Overlapping bookings are rejected by the ex_Show_*_period
+    # exclusion constraints (see migrations).
+    duration_minutes = db.Column(
+        db.Integer, nullable=False, default=120, server_default='120')
+    updated_at = db.Column(
+        db.DateTime, nullable=False, index=True,
+        default=datetime.utcnow, onupdate=datetime.utcnow,
+        server_default=db.text("(now() AT TIME ZONE 'utc')")
+    )
+
+
+
+class ShowDayCount(db.Model):
+    # Number of shows per venue and (UTC) day, maintained by the
+    # show_day_counts triggers on "Show". Backs the calendar overview.
+    __tablename__ = 'ShowDayCount'
+
+    day = db.Column(db.Date, primary_key=True)
+    venue_id = db.Column(
+        db.Integer,
+        db.ForeignKey('Venue.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    count = db.Column(db.Integer, nullable=False)
 
 #----------------------------------------------------------------------------#
 # Filters.
 #----------------------------------------------------------------------------#
 
 
-def format_datetime(value, format='medium'):
-    date = dateutil.parser.parse(value)
-    if format == 'full':
-        format = "EEEE MMMM, d, y 'at' h:mma"
-    elif format == 'medium':
-        format = "EE MM, dd, y h:mma"
-    return babel.dates.format_datetime(date, format)
+app.jinja_env.filters['datetime'] = format_datetime
+# Show lists: {% set start_times = shows|map(attribute='start_time')|list|datetimes('full') %}
+app.jinja_env.filters['datetimes'] = format_datetimes
+init_templates(app)
 
 
 #----------------------------------------------------------------------------#
 # Helper functions.
 #----------------------------------------------------------------------------#
 
-def get_past_or_future_shows(shows, is_future):
-    if is_future:
-        return_shows = [
-            show for show in shows if date_is_in_future(show.start_time)
-        ]
+def genre_array(model, genres):
+    # Array literal for comparisons with the genres column. Postgres has
+    # no varchar[] && text[] operator, so it is cast to the column type.
+    return db.cast(postgresql.array(genres), model.genres.type)
+
+
+def parse_utc_datetime(value):
+    # Show times are stored as naive UTC, timestamps with an offset (or a
+    # trailing Z) are converted rather than sent to Postgres as timestamptz.
+    parsed = dateutil.parser.parse(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def get_seeking_column(model):
+    return model.seeking_talent if model is Venue else model.seeking_venue
+
+
+def parse_facet_filters(args):
+    # Browse filters: any number of genres (a listing must have all of
+    # them), one state and the seeking flag. Genres are sorted so equal
+    # filter sets share a facet memo entry.
+    genres = sorted(set(args.getlist('genre')))
+    state = args.get('state') or None
+    seeking = {None: None, '1': True, 'true': True, '0': False, 'false': False}
+    if (any(x not in [g.value for g in Genre] for x in genres)
+            or (state and state not in [x.value for x in State])
+            or args.get('seeking') not in seeking):
+        abort(400)
+
+    return {
+        'genres': genres,
+        'state': state,
+        'seeking': seeking[args.get('seeking')]
+    }
+
+
+def filter_listings(query, model, filters=None):
+    # Live (not soft-deleted) venues or artists matching the browse
+    # filters. The genre containment is served by the GIN genres index.
+    query = query.filter(model.deleted_at.is_(None))
+    if not filters:
+        return query
+
+    if filters['genres']:
+        query = query.filter(
+            model.genres.op('@>')(genre_array(model, filters['genres'])))
+    if filters['state']:
+        query = query.filter(model.state == filters['state'])
+    if filters['seeking'] is not None:
+        query = query.filter(get_seeking_column(model) == filters['seeking'])
+    return query
+
+
+def get_facet_counts(model, filters):
+    # Counts per genre, state and seeking flag, plus the total, for the
+    # listings matching the filters, from a single grouped scan. Each
+    # listing is joined to its unnested genres, so the other facets count
+    # distinct ids. GROUPING() tells the grouping set of each row apart.
+    seeking = get_seeking_column(model)
+    genre = db.select([
+        db.func.unnest(model.genres).label('genre')
+    ]).correlate(model).lateral('g')
+
+    rows = filter_listings(db.session.query(
+        genre.c.genre,
+        model.state,
+        seeking,
+        db.func.grouping(genre.c.genre, model.state, seeking),
+        db.func.count(db.distinct(model.id))
+    ).select_from(model).outerjoin(genre, db.true()), model, filters).group_by(
+        db.func.grouping_sets(
+            db.tuple_(genre.c.genre),
+            db.tuple_(model.state),
+            db.tuple_(seeking),
+            db.tuple_()
+        )
+    )
+
+    total = 0
+    facets = {'genres': [], 'state': [], 'seeking': []}
+    # GROUPING() sets a bit for every column a row is aggregated over,
+    # genre being the highest
+    for genre_value, state, seeking_value, grouping, count in rows:
+        if grouping == 0b111:
+            total = count
+        elif grouping == 0b011 and genre_value is not None:
+            facets['genres'].append({'value': genre_value, 'count': count})
+        elif grouping == 0b101 and state is not None:
+            facets['state'].append({'value': state, 'count': count})
+        elif grouping == 0b110 and seeking_value is not None:
+            facets['seeking'].append({'value': seeking_value, 'count': count})
+
+    for values in facets.values():
+        values.sort(key=lambda x: (-x['count'], str(x['value'])))
+
+    return {'total': total, 'facets': facets}
+
+
+def get_cached_facet_counts(model, filters):
+    key = ':'.join([
+        'facets', model.__tablename__, ','.join(filters['genres']),
+        filters['state'] or '', str(filters['seeking'])
+    ])
+    return facet_cache.get_or_set(key, lambda: get_facet_counts(model, filters))
+
+
+def get_facet_links(endpoint, filters, counts):
+    # Facet values of a browse page with the URL that toggles each of them
+    def link(label, count, active, **changes):
+        args = dict(filters, **changes)
+        return {
+            'label': label,
+            'count': count,
+            'active': active,
+            'url': url_for(
+                endpoint, genre=args['genres'], state=args['state'],
+                seeking=None if args['seeking'] is None else int(args['seeking']))
+        }
+
+    facets = counts['facets']
+    return [{
+        'name': 'Genres',
+        'values': [link(
+            x['value'], x['count'], x['value'] in filters['genres'],
+            genres=[g for g in filters['genres'] if g != x['value']]
+            if x['value'] in filters['genres'] else filters['genres'] + [x['value']]
+        ) for x in facets['genres']]
+    }, {
+        'name': 'State',
+        'values': [link(
+            x['value'], x['count'], x['value'] == filters['state'],
+            state=None if x['value'] == filters['state'] else x['value']
+        ) for x in facets['state']]
+    }, {
+        'name': 'Seeking',
+        'values': [link(
+            'Yes' if x['value'] else 'No', x['count'],
+            x['value'] == filters['seeking'],
+            seeking=None if x['value'] == filters['seeking'] else x['value']
+        ) for x in facets['seeking']]
+    }]
+
+
+def get_venue_areas(filters=None):
+    # Builds the city/state venue directory from a single query over the
+    # venue rows, upcoming show counts come from the precomputed counters.
+    rows = filter_listings(db.session.query(
+        Venue.city,
+        Venue.state,
+        Venue.id,
+        Venue.name,
+        Venue.upcoming_shows_count.label('num_upcoming_shows')
+    ), Venue, filters).order_by(
+        Venue.city, Venue.state, Venue.name
+    ).all()
+
+    areas = []
+    for (city, state), venues in groupby(rows, key=lambda x: (x.city, x.state)):
+        areas.append({
+            'city': city,
+            'state': state,
+            'venues': [{
+                'id': x.id,
+                'name': x.name,
+                'num_upcoming_shows': x.num_upcoming_shows
+            } for x in venues]
+        })
+
+    return areas
+
+
+def search_entities(model, search_term):
+    # Case-insensitive partial match on name or city, plus any genre whose
+    # name contains the term. The ILIKE patterns are served by the trigram
+    # indexes and results are ranked by trigram similarity.
+    pattern = f'%{search_term}%'
+
+    conditions = [model.name.ilike(pattern), model.city.ilike(pattern)]
+    genres = [
+        x.value for x in Genre if search_term.lower() in x.value.lower()
+    ]
+    if genres:
+        conditions.append(model.genres.op('&&')(genre_array(model, genres)))
+
+    rank = db.func.greatest(
+        db.func.similarity(model.name, search_term),
+        db.func.similarity(model.city, search_term)
+    )
+
+    return db.session.query(
+        model.id,
+        model.name,
+        model.upcoming_shows_count.label('num_upcoming_shows')
+    ).filter(
+        db.or_(*conditions),
+        model.deleted_at.is_(None)
+    ).order_by(
+        rank.desc(), model.name
+    ).limit(app.config['SEARCH_RESULTS_LIMIT']).all()
+
+
+def get_show_sections(owner_column, owner_id, counterpart):
+    # Loads the past and upcoming shows of a venue or artist together with
+    # the id, name and image of the other side of each show. The split is
+    # done in SQL against a single "now" snapshot so every show is assigned
+    # to exactly one section.
+    now = datetime.utcnow()
+    prefix = counterpart.__tablename__.lower()
+
+    # shows with a soft-deleted counterpart are neither listed nor counted
+    counts = db.session.query(
+        db.func.count(Show.id).filter(Show.start_time <= now),
+        db.func.count(Show.id).filter(Show.start_time > now)
+    ).select_from(Show).join(
+        counterpart, getattr(Show, f'{prefix}_id') == counterpart.id
+    ).filter(
+        owner_column == owner_id,
+        counterpart.deleted_at.is_(None)
+    ).one()
+
+    shows_query = db.session.query(
+        Show.id.label('show_id'),
+        counterpart.id,
+        counterpart.name,
+        counterpart.image_link,
+        counterpart.version,
+        Show.start_time
+    ).select_from(Show).join(
+        counterpart, getattr(Show, f'{prefix}_id') == counterpart.id
+    ).filter(
+        owner_column == owner_id,
+        counterpart.deleted_at.is_(None)
+    )
+
+    past_shows = shows_query.filter(
+        Show.start_time <= now
+    ).order_by(Show.start_time.desc()).all()
+    upcoming_shows = shows_query.filter(
+        Show.start_time > now
+    ).order_by(Show.start_time).all()
+
+    def serialize(rows):
+        return [{
+            'show_id': x.show_id,
+            f'{prefix}_id': x.id,
+            f'{prefix}_name': x.name,
+            f'{prefix}_image_link': x.image_link,
+            f'{prefix}_version': x.version,
+            'start_time': x.start_time
+        } for x in rows]
+
+    return {
+        'past_shows': serialize(past_shows),
+        'upcoming_shows': serialize(upcoming_shows),
+        'past_shows_count': counts[0],
+        'upcoming_shows_count': counts[1],
+    }
+
+
+def get_shows_query(args):
+    # Shows joined with their venue and artist columns, ordered by the
+    # (start_time, id) keyset and narrowed by the optional listing filters.
+    query = db.session.query(
+        Show.id,
+        Show.start_time,
+        Show.venue_id,
+        Venue.name.label('venue_name'),
+        Show.artist_id,
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link'),
+        Venue.version.label('venue_version'),
+        Artist.version.label('artist_version')
+    ).join(
+        Venue, Show.venue_id == Venue.id
+    ).join(
+        Artist, Show.artist_id == Artist.id
+    ).filter(
+        Venue.deleted_at.is_(None),
+        Artist.deleted_at.is_(None)
+    )
+
+    try:
+        if args.get('from'):
+            query = query.filter(
+                Show.start_time >= dateutil.parser.parse(args['from']))
+        if args.get('to'):
+            query = query.filter(
+                Show.start_time < dateutil.parser.parse(args['to']))
+        if args.get('venue_id'):
+            query = query.filter(Show.venue_id == int(args['venue_id']))
+        if args.get('artist_id'):
+            query = query.filter(Show.artist_id == int(args['artist_id']))
+    except (ValueError, OverflowError):
+        abort(400)
+
+    if args.get('city'):
+        query = query.filter(Venue.city == args['city'])
+    if args.get('state'):
+        query = query.filter(Venue.state == args['state'])
+    if args.get('genre'):
+        query = query.filter(
+            Artist.genres.op('&&')(genre_array(Artist, [args['genre']])))
+
+    return query.order_by(Show.start_time, Show.id)
+
+
+def parse_calendar_window(args):
+    # [from, to) window of whole days, defaulting to the coming week and
+    # capped at CALENDAR_MAX_DAYS.
+    try:
+        start = dateutil.parser.parse(args['from']).date() \
+            if args.get('from') else datetime.utcnow().date()
+        end = dateutil.parser.parse(args['to']).date() \
+            if args.get('to') else start + timedelta(days=7)
+    except (ValueError, OverflowError):
+        abort(400)
+
+    if end <= start or (end - start).days > app.config['CALENDAR_MAX_DAYS']:
+        abort(400)
+
+    return start, end
+
+
+def get_calendar_shows(args):
+    start, end = parse_calendar_window(args)
+    filters = dict(args, **{'from': start.isoformat(), 'to': end.isoformat()})
+    shows = get_shows_query(filters).all()
+
+    return {
+        'from': start,
+        'to': end,
+        'days': [{
+            'date': day,
+            'shows': [serialize_show(x) for x in day_shows]
+        } for day, day_shows in groupby(shows, key=lambda x: x.start_time.date())]
+    }
+
+
+def get_calendar_counts(args):
+    # Shows per day for a month-sized window, leaving out the shows of
+    # soft-deleted venues and artists like the show listings do. Counts
+    # come from the precomputed ShowDayCount rows of live venues, minus the
+    # shows of soft-deleted artists, found through their (artist_id,
+    # start_time) index. A genre filter (on artist genres) falls back to
+    # counting shows through the start_time index.
+    start, end = parse_calendar_window(args)
+
+    def in_venue_area(query):
+        query = query.filter(Venue.deleted_at.is_(None))
+        if args.get('city'):
+            query = query.filter(Venue.city == args['city'])
+        if args.get('state'):
+            query = query.filter(Venue.state == args['state'])
+        return query
+
+    show_day = db.cast(Show.start_time, db.Date)
+    if args.get('genre'):
+        counts = in_venue_area(db.session.query(
+            show_day.label('day'), db.func.count(Show.id).label('count')
+        ).join(
+            Venue, Show.venue_id == Venue.id
+        ).join(
+            Artist, Show.artist_id == Artist.id
+        ).filter(
+            Show.start_time >= start,
+            Show.start_time < end,
+            Artist.deleted_at.is_(None),
+            Artist.genres.op('&&')(genre_array(Artist, [args['genre']]))
+        ).group_by(show_day)).subquery()
     else:
-        return_shows = [
-            show for show in shows if not date_is_in_future(show.start_time)
-        ]
+        stored = in_venue_area(db.session.query(
+            ShowDayCount.day.label('day'), ShowDayCount.count.label('count')
+        ).join(
+            Venue, ShowDayCount.venue_id == Venue.id
+        ).filter(
+            ShowDayCount.day >= start,
+            ShowDayCount.day < end
+        ))
+        hidden = in_venue_area(db.session.query(
+            show_day, -db.func.count(Show.id)
+        ).join(
+            Venue, Show.venue_id == Venue.id
+        ).join(
+            Artist, Show.artist_id == Artist.id
+        ).filter(
+            Show.start_time >= start,
+            Show.start_time < end,
+            Artist.deleted_at.isnot(None)
+        ).group_by(show_day))
+        counts = stored.union_all(hidden).subquery()
+
+    total = db.func.sum(counts.c.count)
+    query = db.session.query(counts.c.day, total).group_by(
+        counts.c.day
+    ).having(total > 0).order_by(counts.c.day)
+
+    return {
+        'from': start,
+        'to': end,
+        'days': [{'date': x[0], 'count': int(x[1])} for x in query]
+    }
 
-    return return_shows
 
+def encode_show_cursor(show):
+    return f'{show.start_time.isoformat()}_{show.id}'
 
-def date_is_in_future(date):
-    return date > datetime.utcnow()
 
+def decode_show_cursor(cursor):
+    try:
+        start_time, show_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(start_time), int(show_id)
+    except ValueError:
+        abort(400)
+
+
+def serialize_show(show):
+    return {
+        'show_id': show.id,
+        'venue_id': show.venue_id,
+        'venue_name': show.venue_name,
+        'venue_version': show.venue_version,
+        'artist_id': show.artist_id,
+        'artist_name': show.artist_name,
+        'artist_image_link': show.artist_image_link,
+        'artist_version': show.artist_version,
+        'start_time': show.start_time
+    }
 
-def convert_datetime_to_string(datetime_obj):
-    return datetime.strftime(datetime_obj, '%Y-%m-%dT%H:%M:%S.%fZ')
 
+def get_shows_page(args):
+    query = get_shows_query(args)
 
-app.jinja_env.filters['datetime'] = format_datetime
+    cursor = args.get('after')
+    if cursor:
+        query = query.filter(
+            db.tuple_(Show.start_time, Show.id) > decode_show_cursor(cursor)
+        )
+
+    page_size = app.config['SHOWS_PER_PAGE']
+    shows = query.limit(page_size + 1).all()
+
+    next_cursor = None
+    if len(shows) > page_size:
+        shows = shows[:page_size]
+        next_cursor = encode_show_cursor(shows[-1])
+
+    return {
+        'shows': [serialize_show(x) for x in shows],
+        'next_cursor': next_cursor
+    }
+
+
+def get_export_query(kind, since=None):
+    # Catalog rows for analytics exports, read through a server-side cursor
+    # in chunks of EXPORT_CHUNK_SIZE. Shows carry their venue and artist
+    # names. With since, only rows changed at or after that time are
+    # exported. Soft-deleted venues and artists are exported with their
+    # deleted_at tombstone, so incremental dumps pick up the deletion.
+    if kind == 'venues':
+        model = Venue
+        query = db.session.query(
+            Venue.id, Venue.name, Venue.city, Venue.state, Venue.address,
+            Venue.phone, Venue.genres, Venue.image_link, Venue.facebook_link,
+            Venue.website, Venue.seeking_talent, Venue.seeking_description,
+            Venue.updated_at, Venue.deleted_at
+        )
+    elif kind == 'artists':
+        model = Artist
+        query = db.session.query(
+            Artist.id, Artist.name, Artist.city, Artist.state, Artist.phone,
+            Artist.genres, Artist.image_link, Artist.facebook_link,
+            Artist.website, Artist.seeking_venue, Artist.seeking_description,
+            Artist.updated_at, Artist.deleted_at
+        )
+    else:
+        model = Show
+        query = db.session.query(
+            Show.id, Show.start_time, Show.duration_minutes,
+            Show.venue_id, Venue.name.label('venue_name'),
+            Show.artist_id, Artist.name.label('artist_name'),
+            Show.updated_at
+        ).join(
+            Venue, Show.venue_id == Venue.id
+        ).join(
+            Artist, Show.artist_id == Artist.id
+        )
+
+    if since:
+        query = query.filter(model.updated_at >= since)
+
+    return query.order_by(model.id).yield_per(app.config['EXPORT_CHUNK_SIZE'])
+
+
+def get_export_columns(query):
+    return [x['name'] for x in query.column_descriptions]
+
+
+def find_booking_conflicts(slots):
+    # Checks candidate (venue_id, artist_id, start_time, duration_minutes)
+    # slots against existing shows in one statement. Each side of the
+    # UNION is an indexed probe of one of the exclusion constraints.
+    values, params = [], {}
+    for i, slot in enumerate(slots):
+        values.append(f'(:i{i}, :v{i}, :a{i}, tsrange(:s{i}, :e{i}))')
+        params.update({
+            f'i{i}': i,
+            f'v{i}': slot['venue_id'],
+            f'a{i}': slot['artist_id'],
+            f's{i}': slot['start_time'],
+            f'e{i}': slot['start_time'] + timedelta(minutes=slot['duration_minutes']),
+        })
+
+    show_period = (
+        "tsrange(s.start_time, s.start_time + s.duration_minutes * interval '1 minute')"
+    )
+    rows = db.session.execute(f"""
+        WITH candidate (slot, venue_id, artist_id, period) AS (
+            VALUES {', '.join(values)}
+        )
+        SELECT c.slot, s.id, s.venue_id, s.artist_id, s.start_time, 'venue' AS reason
+        FROM candidate c JOIN "Show" s
+            ON s.venue_id = c.venue_id AND {show_period} && c.period
+        UNION ALL
+        SELECT c.slot, s.id, s.venue_id, s.artist_id, s.start_time, 'artist' AS reason
+        FROM candidate c JOIN "Show" s
+            ON s.artist_id = c.artist_id AND {show_period} && c.period
+    """, params)
+
+    conflicts = [[] for _ in slots]
+    for x in rows:
+        conflicts[x.slot].append({
+            'show_id': x.id,
+            'venue_id': x.venue_id,
+            'artist_id': x.artist_id,
+            'start_time': x.start_time,
+            'reason': x.reason
+        })
+    return conflicts
+
+
+def get_live_or_404(model, listing_id):
+    # Soft-deleted venues and artists are gone for every page and write
+    return model.query.filter(
+        model.id == listing_id, model.deleted_at.is_(None)).first_or_404()
+
+
+def get_venue_data(venue_id):
+    venue = Venue.query.get(venue_id)
+    if not venue or venue.deleted_at:
+        return None
+
+    data = {
+        "id": venue.id,
+        "name": venue.name,
+        "genres": venue.genres,
+        "address": venue.address,
+        "city": venue.city,
+        "state": venue.state,
+        "phone": venue.phone,
+        "website": venue.website,
+        "facebook_link": venue.facebook_link,
+        "seeking_talent": venue.seeking_talent,
+        "seeking_description": venue.seeking_description,
+        "image_link": venue.image_link,
+        "version": venue.version,
+    }
+    data.update(get_show_sections(Show.venue_id, venue.id, Artist))
+
+    return data
+
+
+def get_artist_data(artist_id):
+    artist = Artist.query.get(artist_id)
+    if not artist or artist.deleted_at:
+        return None
+
+    data = {
+        "id": artist.id,
+        "name": artist.name,
+        "genres": artist.genres,
+        "city": artist.city,
+        "state": artist.state,
+        "phone": artist.phone,
+        "website": artist.website,
+        "facebook_link": artist.facebook_link,
+        "seeking_venue": artist.seeking_venue,
+        "seeking_description": artist.seeking_description,
+        "image_link": artist.image_link,
+        "version": artist.version,
+    }
+    data.update(get_show_sections(Show.artist_id, artist.id, Venue))
+
+    return data
+
+
+def delete_listing(model, owner_column, counterpart_column, listing_id, soft):
+    # Deletes a venue or artist without loading its shows into the session.
+    # The row is locked first so no show can be booked against it in the
+    # meantime, its shows are counted, and the ON DELETE CASCADE foreign
+    # keys remove them with the row. A soft delete only tombstones the row,
+    # its shows are kept and hidden from the listings. Returns None if
+    # there is no such listing.
+    query = db.session.query(model.id).filter(model.id == listing_id)
+    if soft:
+        query = query.filter(model.deleted_at.is_(None))
+    if query.with_for_update().first() is None:
+        return None
+
+    show_count, counterpart_ids = db.session.query(
+        db.func.count(Show.id),
+        db.func.array_agg(db.distinct(counterpart_column))
+    ).filter(owner_column == listing_id).one()
+
+    rows = db.session.query(model).filter(model.id == listing_id)
+    if soft:
+        now = datetime.utcnow()
+        rows.update({
+            model.deleted_at: now,
+            model.updated_at: now,
+            model.version: model.version + 1
+        }, synchronize_session=False)
+    else:
+        rows.delete(synchronize_session=False)
+
+    return {
+        'shows_removed': 0 if soft else show_count,
+        'counterpart_ids': counterpart_ids or []
+    }
+
+
+def get_show_counterpart_ids(owner_column, owner_id, counterpart_column):
+    return [x[0] for x in db.session.query(
+        counterpart_column
+    ).filter(owner_column == owner_id).distinct()]
+
+
+def evict_cached_pages(*keys, venue_ids=(), artist_ids=()):
+    keys = [
+        *keys,
+        *[f'venue:{x}' for x in venue_ids],
+        *[f'artist:{x}' for x in artist_ids]
+    ]
+    cache.delete(*keys, *[f'api:{x}' for x in keys])
+
+
+def get_search_results(model, search_term):
+    matches = search_entities(model, search_term)
+    return {
+        "count": len(matches),
+        "data": [{
+            "id": x.id,
+            "name": x.name,
+            "num_upcoming_shows": x.num_upcoming_shows
+        } for x in matches]
+    }
+
+
+def api_response(key, builder):
+    # Serializes the builder's data once per cache entry and remembers its
+    # ETag and Last-Modified, so conditional requests for unchanged
+    # resources are answered with a 304 straight from the cache. Requests
+    # without a key (filtered listings, searches) are never cached.
+    entry = cache.get(f'api:{key}') if key else None
+    if entry is None:
+        data = builder()
+        if data is None:
+            abort(404)
+
+        body = dumps_json(data)
+        entry = {
+            'body': body,
+            'etag': hashlib.sha1(body.encode()).hexdigest(),
+            'last_modified': http_date(datetime.utcnow())
+        }
+        if key:
+            cache.set(f'api:{key}', entry)
+
+    response = Response(entry['body'], mimetype='application/json')
+    response.set_etag(entry['etag'])
+    response.headers['Last-Modified'] = entry['last_modified']
+    return response.make_conditional(request)
+
+
+def get_artist_list(filters=None):
+    return [{
+        "id": x.id,
+        "name": x.name
+    } for x in filter_listings(
+        db.session.query(Artist.id, Artist.name), Artist, filters
+    ).order_by(Artist.id)]
+
+
+def render_edit_conflict(template, form_class, **context):
+    # The listing was saved by someone else after this edit form was
+    # loaded. Answer 409 with the form reloaded from the current row (and
+    # its current version) so the change can be reapplied on top of it.
+    entity = next(iter(context.values()))
+    flash(
+        f'{entity.name} was changed by someone else while you were editing. '
+        'Review the current details and submit your changes again.', 'error')
+    form = form_class(formdata=None, obj=entity)
+    return render_template(template, form=form, **context), 409
+
+
+def apply_batch_edit(kind, items):
+    # Creates (items without an id) and partial updates for venues or
+    # artists, validated with the HTML forms. New rows are written with one
+    # multi-row INSERT, updates with one UPDATE ... FROM (VALUES ...) per
+    # distinct set of fields, all in a single transaction. Updates bump the
+    # row version like ORM edits do, and ones that name a stale version are
+    # reported as conflicts. Soft-deleted rows are not found, and the rows
+    # to update stay locked so none is deleted before it is written.
+    model, form_class, columns = IMPORT_COLUMNS[kind]
+
+    ids = {x['id'] for x in items if isinstance(x, dict) and type(x.get('id')) is int}
+    current = {
+        row.id: {column: getattr(row, column) for column in columns}
+        for row in db.session.query(
+            model.id, *[getattr(model, x) for x in columns]
+        ).filter(
+            model.id.in_(ids), model.deleted_at.is_(None)
+        ).with_for_update()
+    } if ids else {}
+
+    batch = validate_batch(items, form_class, columns, current)
+    creates = [x for x in batch if x.status is None and x.id is None]
+    updates = [x for x in batch if x.status is None and x.id is not None]
+    now = datetime.utcnow()
+
+    try:
+        if creates:
+            result = db.session.execute(model.__table__.insert().values([
+                {**x.values, 'updated_at': now} for x in creates
+            ]).returning(model.id, model.version))
+            for entry, row in zip(creates, result):
+                entry.id, entry.version = row
+                entry.status = 'created'
+
+        def field_set(entry):
+            return sorted(entry.fields), entry.version is not None
+
+        updates.sort(key=field_set)
+        for _, group in groupby(updates, key=field_set):
+            group = list(group)
+            rows = [{'id': x.id, **x.values, 'updated_at': now} for x in group]
+            if group[0].version is not None:
+                for row, entry in zip(rows, group):
+                    row['version'] = entry.version
+
+            updated = dict(update_from_values(
+                db.session, model.__table__, rows, version='version'))
+            for entry in group:
+                if entry.id in updated:
+                    entry.version = updated[entry.id]
+                    entry.status = 'updated'
+                else:
+                    entry.fail('conflict' if entry.version is not None else 'not_found', None)
+
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logging.exception(f'Batch edit of {kind} failed')
+        for entry in creates:
+            entry.id = None
+        for entry in creates + updates:
+            entry.version = None
+            entry.fail('failed', {'batch': [str(getattr(e, 'orig', e))]})
+        return [x.result for x in batch]
+
+    changed = [x.id for x in batch if x.status in ('created', 'updated')]
+    if changed:
+        if model is Venue:
+            evict_cached_pages('venues', 'shows', venue_ids=changed, artist_ids=[
+                x[0] for x in db.session.query(Show.artist_id).filter(
+                    Show.venue_id.in_(changed)).distinct()
+            ])
+        else:
+            evict_cached_pages('artists', 'shows', artist_ids=changed, venue_ids=[
+                x[0] for x in db.session.query(Show.venue_id).filter(
+                    Show.artist_id.in_(changed)).distinct()
+            ])
+
+    return [x.result for x in batch]
+
+
+def batch_edit_response(kind):
+    # {"items": [{"id": 1, "seeking_talent": false}, {"name": "New", ...}]}
+    payload = request.get_json(silent=True) or {}
+    items = payload.get('items')
+    if not isinstance(items, list) or not items \
+            or len(items) > app.config['BATCH_MAX_ITEMS']:
+        abort(400)
+
+    return Response(dumps_json({'results': apply_batch_edit(kind, items)}),
+                    mimetype='application/json')
+
+
+def load_match_listings(kind, since):
+    # All live venues or artists, or every row changed since a time
+    # (soft deleted ones included, so they leave the match index)
+    model = Venue if kind == 'venues' else Artist
+    query = db.session.query(
+        model.id, model.name, model.genres, model.city, model.state,
+        get_seeking_column(model), model.deleted_at, model.updated_at
+    )
+    if since is None:
+        query = query.filter(model.deleted_at.is_(None))
+    else:
+        query = query.filter(model.updated_at >= since)
+    return query.yield_per(app.config['EXPORT_CHUNK_SIZE'])
+
+
+def load_match_history():
+    return db.session.query(
+        Show.venue_id, Show.artist_id, db.func.count(Show.id)
+    ).filter(
+        Show.start_time < datetime.utcnow()
+    ).group_by(Show.venue_id, Show.artist_id)
+
+
+matchmaker = Matchmaker(
+    load_match_listings, load_match_history,
+    refresh_interval=app.config['MATCH_REFRESH_SECONDS'],
+    rebuild_interval=app.config['MATCH_REBUILD_SECONDS']
+)
+
+
+def match_response(kind, subject_id):
+    try:
+        limit = min(int(request.args.get('limit', 10)),
+                    app.config['MATCH_RESULTS_LIMIT'])
+    except ValueError:
+        abort(400)
+
+    matches = matchmaker.match(kind, subject_id, max(limit, 1))
+    if matches is None:
+        abort(404)
+    return Response(dumps_json({'matches': matches}),
+                    mimetype='application/json')
 
 #----------------------------------------------------------------------------#
 # Controllers.
@@ -144,94 +1100,48 @@ def index():
 #  ----------------------------------------------------------------
 
 @app.route('/venues')
+@read_only
 def venues():
-    data = []
-
-    city_states = db.session.query(Venue.city, Venue.state).distinct().all()
-    for city_state_pair in city_states:
-        matching_venues = Venue.query.filter(
-            Venue.city == city_state_pair[0], Venue.state == city_state_pair[1]
-        ).all()
-
-        city_data = {
-            'city': city_state_pair[0],
-            'state': city_state_pair[1],
-            'venues': [{
-                'id': x.id,
-                'name': x.name,
-                'num_upcoming_shows': len(x.shows)
-            } for x in matching_venues]
-        }
-        data.append(city_data)
+    # the unfiltered directory is cached, filtered browsing is served by
+    # the GIN and partial indexes and only the facet counts are memoized
+    filters = parse_facet_filters(request.args)
+    if request.args:
+        data = get_venue_areas(filters)
+    else:
+        data = cache.get_or_set('venues', get_venue_areas)
 
-    return render_template('pages/venues.html', areas=data)
+    counts = get_cached_facet_counts(Venue, filters)
+    return render_template(
+        'pages/venues.html', areas=data, total=counts['total'],
+        facets=get_facet_links('venues', filters, counts))
 
 
 @app.route('/venues/search', methods=['POST'])
+@read_only
 def search_venues():
     # Search on artists with partial string search. Ensure it is case-insensitive.
     # seach for Hop should return "The Musical Hop".
     # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
     search_term = request.form.get('search_term', '')
-    matches = Venue.query.filter(Venue.name.ilike(f'%{search_term}%')).all()
-
-    response = {
-        "count": len(matches),
-        "data": [{
-            "id": x.id,
-            "name": x.name,
-            "num_upcoming_shows": len(x.shows)
-        } for x in matches]
-    }
+    response = get_search_results(Venue, search_term)
 
     return render_template(
         'pages/search_venues.html',
         results=response,
-        search_term=request.form.get('search_term', '')
+        search_term=search_term
     )
 
 
 @app.route('/venues/<int:venue_id>')
+@read_only
 def show_venue(venue_id):
     # shows the venue page with the given venue_id
 
-    venue = Venue.query.get(venue_id)
-
-    if not venue:
+    data = cache.get_or_set(
+        f'venue:{venue_id}', lambda: get_venue_data(venue_id))
+    if not data:
         return abort(404)
 
-    future_shows = get_past_or_future_shows(venue.shows, is_future=True)
-    past_shows = get_past_or_future_shows(venue.shows, is_future=False)
-
-    data = {
-        "id": venue.id,
-        "name": venue.name,
-        "genres": venue.genres,
-        "address": venue.address,
-        "city": venue.city,
-        "state": venue.state,
-        "phone": venue.phone,
-        "website": venue.website,
-        "facebook_link": venue.facebook_link,
-        "seeking_talent": venue.seeking_talent,
-        "seeking_description": venue.seeking_description,
-        "image_link": venue.image_link,
-        "past_shows": [{
-            "artist_id": x.artist_id,
-            "artist_name": x.artist.name,
-            "artist_image_link": x.artist.image_link,
-            "start_time": convert_datetime_to_string(x.start_time)
-        } for x in past_shows],
-        "upcoming_shows": [{
-            "artist_id": x.artist_id,
-            "artist_name": x.artist.name,
-            "artist_image_link": x.artist.image_link,
-            "start_time": convert_datetime_to_string(x.start_time)
-        } for x in future_shows],
-        "past_shows_count": len(past_shows),
-        "upcoming_shows_count": len(future_shows),
-    }
-
     return render_template('pages/show_venue.html', venue=data)
 
 #  Create Venue
@@ -266,6 +1176,7 @@ def create_venue_submission():
         try:
             db.session.add(venue)
             db.session.commit()
+            evict_cached_pages('venues')
 
             # on successful db insert, flash success
             flash(f'Venue {name} was successfully listed!')
@@ -284,101 +1195,104 @@ def create_venue_submission():
     return render_template('pages/home.html')
 
 
-@app.route('/venues/<venue_id>', methods=['DELETE'])
+@app.route('/venues/<int:venue_id>', methods=['DELETE'])
 def delete_venue(venue_id):
-    error = False
+    # ?soft=1 tombstones the venue instead of removing it and its shows
+    soft = request.args.get('soft') in ('1', 'true')
     try:
-        Venue.query.filter(Venue.id == venue_id).delete()
+        result = delete_listing(
+            Venue, Show.venue_id, Show.artist_id, venue_id, soft)
         db.session.commit()
     except:
-        error = True
         logging.exception('Could not delete venue')
         db.session.rollback()
+        return jsonify({'status': 'ERROR'}), 500
     finally:
         db.session.close()
 
-    if not error:
-        return jsonify({'status': 'OK'})
-    else:
-        return jsonify({'status': 'ERROR'}), 500
+    if result is None:
+        return jsonify({'status': 'NOT_FOUND'}), 404
+
+    evict_cached_pages(
+        'venues', 'shows',
+        venue_ids=[venue_id], artist_ids=result['counterpart_ids'])
+    return jsonify({
+        'status': 'OK',
+        'soft': soft,
+        'shows_removed': result['shows_removed']
+    })
 
 #  Artists
 #  ----------------------------------------------------------------
 @app.route('/artists')
+@read_only
 def artists():
+    filters = parse_facet_filters(request.args)
+    if request.args:
+        data = get_artist_list(filters)
+    else:
+        data = cache.get_or_set('artists', get_artist_list)
 
-    artists = Artist.query.all()
-    data = [{
-        "id": x.id,
-        "name": x.name
-    } for x in artists]
-    return render_template('pages/artists.html', artists=data)
+    counts = get_cached_facet_counts(Artist, filters)
+    return render_template(
+        'pages/artists.html', artists=data, total=counts['total'],
+        facets=get_facet_links('artists', filters, counts))
 
 
 @app.route('/artists/search', methods=['POST'])
+@read_only
 def search_artists():
     # search for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
     # search for "band" should return "The Wild Sax Band".
     search_term = request.form.get('search_term', '')
-    matches = Artist.query.filter(
-        Artist.name.ilike(f'%{search_term}%')
-    ).all()
-    response = {
-        "count": len(matches),
-        "data": [{
-            "id": x.id,
-            "name": x.name,
-            "num_upcoming_shows": len(x.shows)
-        } for x in matches]
-    }
+    response = get_search_results(Artist, search_term)
     return render_template('pages/search_artists.html', results=response, search_term=search_term)
 
 
 @app.route('/artists/<int:artist_id>')
+@read_only
 def show_artist(artist_id):
     # shows the venue page with the given venue_id
-    artist = Artist.query.get(artist_id)
-    if not artist:
+    data = cache.get_or_set(
+        f'artist:{artist_id}', lambda: get_artist_data(artist_id))
+    if not data:
         return abort(404)
 
-    future_shows = get_past_or_future_shows(artist.shows, is_future=True)
-    past_shows = get_past_or_future_shows(artist.shows, is_future=False)
+    return render_template('pages/show_artist.html', artist=data)
 
-    data = {
-        "id": artist.id,
-        "name": artist.name,
-        "genres": artist.genres,
-        "city": artist.city,
-        "state": artist.state,
-        "phone": artist.phone,
-        "website": artist.website,
-        "facebook_link": artist.facebook_link,
-        "seeking_venue": artist.seeking_venue,
-        "seeking_description": artist.seeking_description,
-        "image_link": artist.image_link,
-        "past_shows": [{
-            "venue_id": x.venue_id,
-            "venue_name": x.venue.name,
-            "venue_image_link": x.venue.image_link,
-            "start_time": convert_datetime_to_string(x.start_time)
-        } for x in past_shows],
-        "upcoming_shows": [{
-            "venue_id": x.venue_id,
-            "venue_name": x.venue.name,
-            "venue_image_link": x.venue.image_link,
-            "start_time": convert_datetime_to_string(x.start_time)
-        } for x in future_shows],
-        "past_shows_count": len(past_shows),
-        "upcoming_shows_count": len(future_shows),
-    }
+@app.route('/artists/<int:artist_id>', methods=['DELETE'])
+def delete_artist(artist_id):
+    soft = request.args.get('soft') in ('1', 'true')
+    try:
+        result = delete_listing(
+            Artist, Show.artist_id, Show.venue_id, artist_id, soft)
+        db.session.commit()
+    except:
+        logging.exception('Could not delete artist')
+        db.session.rollback()
+        return jsonify({'status': 'ERROR'}), 500
+    finally:
+        db.session.close()
+
+    if result is None:
+        return jsonify({'status': 'NOT_FOUND'}), 404
+
+    evict_cached_pages(
+        'artists', 'shows',
+        artist_ids=[artist_id], venue_ids=result['counterpart_ids'])
+    return jsonify({
+        'status': 'OK',
+        'soft': soft,
+        'shows_removed': result['shows_removed']
+    })
 
-    return render_template('pages/show_artist.html', artist=data)
 
 #  Update
 #  ----------------------------------------------------------------
 @app.route('/artists/<int:artist_id>/edit', methods=['GET'])
+@read_only
 def edit_artist(artist_id):
-    artist = Artist.query.get(artist_id)
+    artist = get_live_or_404(Artist, artist_id)
     form = ArtistForm(obj=artist)
 
     return render_template('forms/edit_artist.html', form=form, artist=artist)
@@ -388,7 +1302,10 @@ def edit_artist(artist_id):
 def edit_artist_submission(artist_id):
     form = ArtistForm(request.form)
     if form.validate():
-        artist = Artist.query.get(artist_id)
+        artist = get_live_or_404(Artist, artist_id)
+        if form.version.data != artist.version:
+            return render_edit_conflict(
+                'forms/edit_artist.html', ArtistForm, artist=artist)
 
         artist.name = form.name.data
         artist.city = form.city.data
@@ -403,7 +1320,18 @@ def edit_artist_submission(artist_id):
 
         try:
             db.session.commit()
+            evict_cached_pages(
+                'artists', 'shows',
+                artist_ids=[artist_id],
+                venue_ids=get_show_counterpart_ids(
+                    Show.artist_id, artist_id, Show.venue_id)
+            )
             flash('Artist details updated successfully')
+        except StaleDataError:
+            db.session.rollback()
+            return render_edit_conflict(
+                'forms/edit_artist.html', ArtistForm,
+                artist=get_live_or_404(Artist, artist_id))
         except:
             db.session.rollback()
             flash('Artist details were not able to be updated', 'error')
@@ -418,8 +1346,9 @@ def edit_artist_submission(artist_id):
 
 
 @app.route('/venues/<int:venue_id>/edit', methods=['GET'])
+@read_only
 def edit_venue(venue_id):
-    venue = Venue.query.get(venue_id)
+    venue = get_live_or_404(Venue, venue_id)
     form = VenueForm(obj=venue)
 
     return render_template('forms/edit_venue.html', form=form, venue=venue)
@@ -429,7 +1358,10 @@ def edit_venue(venue_id):
 def edit_venue_submission(venue_id):
     form = VenueForm(request.form)
     if form.validate():
-        venue = Venue.query.get(venue_id)
+        venue = get_live_or_404(Venue, venue_id)
+        if form.version.data != venue.version:
+            return render_edit_conflict(
+                'forms/edit_venue.html', VenueForm, venue=venue)
 
         venue.name = form.name.data
         venue.city = form.city.data
@@ -444,7 +1376,19 @@ def edit_venue_submission(venue_id):
 
         try:
             db.session.commit()
+            evict_cached_pages(
+                'venues', 'shows',
+                venue_ids=[venue_id],
+                artist_ids=get_show_counterpart_ids(
+                    Show.venue_id, venue_id, Show.artist_id)
+            )
             flash(f'Venue updated successfully')
+        except StaleDataError:
+            # changed by another editor between the check and the commit
+            db.session.rollback()
+            return render_edit_conflict(
+                'forms/edit_venue.html', VenueForm,
+                venue=get_live_or_404(Venue, venue_id))
         except:
             db.session.rollback()
         finally:
@@ -490,6 +1434,7 @@ def create_artist_submission():
         try:
             db.session.add(artist)
             db.session.commit()
+            evict_cached_pages('artists')
 
             # on successful db insert, flash success
             flash(f'Artist {artist.name} was successfully listed!')
@@ -515,19 +1460,102 @@ def create_artist_submission():
 #  ----------------------------------------------------------------
 
 @app.route('/shows')
+@read_only
 def shows():
-    # displays list of shows at /shows
-    shows = Show.query.all()
-    data = [{
-        'venue_id': x.venue_id,
-        'venue_name': x.venue.name,
-        'artist_id': x.artist_id,
-        'artist_name': x.artist.name,
-        'artist_image_link': x.artist.image_link,
-        'start_time': convert_datetime_to_string(x.start_time)
-    } for x in shows]
+    # displays list of shows at /shows, one keyset page at a time. Only the
+    # unfiltered first page is cached, later pages and filtered listings
+    # are cheap keyset probes.
+    if request.args:
+        page = get_shows_page(request.args)
+    else:
+        page = cache.get_or_set('shows', lambda: get_shows_page({}))
+
+    next_url = None
+    if page['next_cursor']:
+        filters = {
+            key: value for key, value in request.args.items() if key != 'after'
+        }
+        next_url = url_for('shows', after=page['next_cursor'], **filters)
+
+    return render_template(
+        'pages/shows.html', shows=page['shows'], next_url=next_url)
+
+
+@app.route('/shows/stream')
+@read_only
+def stream_shows():
+    # streams the full (filtered) show listing as newline delimited JSON
+    query = get_shows_query(request.args).yield_per(
+        app.config['SHOWS_STREAM_CHUNK_SIZE'])
+
+    def generate():
+        for show in query:
+            yield dumps_json(serialize_show(show)) + '\n'
+
+    return Response(
+        stream_with_context(generate()), mimetype='application/x-ndjson')
 
-    return render_template('pages/shows.html', shows=data)
+
+#  Calendar
+#  ----------------------------------------------------------------
+
+@app.route('/calendar')
+@read_only
+def calendar():
+    # shows in a [from, to) window grouped by day, with the day counts of
+    # the surrounding month for navigation
+    data = get_calendar_shows(request.args)
+
+    month_start = data['from'].replace(day=1)
+    month_end = (month_start + timedelta(days=32)).replace(day=1)
+    overview = get_calendar_counts(dict(
+        request.args,
+        **{'from': month_start.isoformat(), 'to': month_end.isoformat()}
+    ))
+
+    filters = {
+        key: value for key, value in request.args.items()
+        if key in ('city', 'state', 'genre')
+    }
+    return render_template(
+        'pages/calendar.html',
+        calendar=data,
+        overview=overview,
+        filters=filters,
+        previous_month=(month_start - timedelta(days=1)).replace(day=1),
+        next_month=month_end
+    )
+
+
+#  Export
+#  ----------------------------------------------------------------
+
+@app.route('/export/<any(venues, artists, shows):kind>')
+@read_only
+def export_catalog(kind):
+    # streams a full or incremental (?since=) catalog dump as CSV or NDJSON
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        abort(400)
+
+    since = None
+    if request.args.get('since'):
+        try:
+            since = dateutil.parser.parse(request.args['since'])
+        except (ValueError, OverflowError):
+            abort(400)
+
+    query = get_export_query(kind, since)
+    writer, mimetype = EXPORT_FORMATS[export_format]
+
+    return Response(
+        stream_with_context(writer(get_export_columns(query), query)),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition':
+                f'attachment; filename={kind}.{export_format}'
+        }
+    )
 
 
 @app.route('/shows/create')
@@ -544,19 +1572,42 @@ def create_show_submission():
 
     if form.validate():
         try:
+            # the listings are locked against a concurrent delete, the
+            # foreign keys only know about hard deleted ones
+            listings = db.session.query(Venue.id, Artist.id).filter(
+                Venue.id == form.venue_id.data, Venue.deleted_at.is_(None),
+                Artist.id == form.artist_id.data, Artist.deleted_at.is_(None)
+            ).with_for_update(read=True).first()
+            if listings is None:
+                flash('The artist or venue does not exist.', 'error')
+                return render_template('pages/home.html')
+
             new_show = Show(
                 artist_id=form.artist_id.data,
                 venue_id=form.venue_id.data,
-                start_time=form.start_time.data
+                start_time=form.start_time.data,
+                duration_minutes=form.duration_minutes.data
             )
             db.session.add(new_show)
             db.session.commit()
+            evict_cached_pages(
+                'venues', 'shows',
+                venue_ids=[new_show.venue_id],
+                artist_ids=[new_show.artist_id]
+            )
 
             # on successful db insert, flash success
             flash('Show was successfully listed!')
+        except IntegrityError as e:
+            db.session.rollback()
+            if getattr(e.orig, 'pgcode', None) == EXCLUSION_VIOLATION:
+                flash('The venue or the artist is already booked at that time.', 'error')
+            else:
+                flash('The artist or venue does not exist.', 'error')
         except:
             db.session.rollback()
-            # on successful db insert, flash error
+            # on failed db insert, flash error
+            logging.exception('Unable to create show')
             flash('An error occured. Show could not be listed.', 'error')
         finally:
             db.session.close()
@@ -568,6 +1619,356 @@ def create_show_submission():
     return render_template('pages/home.html')
 
 
+#  API
+#  ----------------------------------------------------------------
+#  JSON versions of the read-only pages, built from the same data and
+#  cache entries as the HTML views.
+
+@app.route('/api/v1/venues')
+@read_only
+def api_venues():
+    if request.args:
+        filters = parse_facet_filters(request.args)
+        return api_response(None, lambda: get_venue_areas(filters))
+    return api_response(
+        'venues', lambda: cache.get_or_set('venues', get_venue_areas))
+
+
+@app.route('/api/v1/venues/facets')
+@read_only
+def api_venue_facets():
+    filters = parse_facet_filters(request.args)
+    return api_response(None, lambda: get_cached_facet_counts(Venue, filters))
+
+
+@app.route('/api/v1/venues/<int:venue_id>')
+@read_only
+def api_show_venue(venue_id):
+    return api_response(f'venue:{venue_id}', lambda: cache.get_or_set(
+        f'venue:{venue_id}', lambda: get_venue_data(venue_id)))
+
+
+@app.route('/api/v1/venues/search')
+@read_only
+def api_search_venues():
+    search_term = request.args.get('search_term', '')
+    return api_response(None, lambda: get_search_results(Venue, search_term))
+
+
+@app.route('/api/v1/artists')
+@read_only
+def api_artists():
+    if request.args:
+        filters = parse_facet_filters(request.args)
+        return api_response(None, lambda: get_artist_list(filters))
+    return api_response(
+        'artists', lambda: cache.get_or_set('artists', get_artist_list))
+
+
+@app.route('/api/v1/artists/facets')
+@read_only
+def api_artist_facets():
+    filters = parse_facet_filters(request.args)
+    return api_response(None, lambda: get_cached_facet_counts(Artist, filters))
+
+
+@app.route('/api/v1/artists/<int:artist_id>/matches')
+@read_only
+def api_artist_matches(artist_id):
+    # seeking venues ranked for the artist
+    return match_response('artists', artist_id)
+
+
+@app.route('/api/v1/venues/<int:venue_id>/matches')
+@read_only
+def api_venue_matches(venue_id):
+    # seeking artists ranked for the venue
+    return match_response('venues', venue_id)
+
+
+@app.route('/api/v1/artists/<int:artist_id>')
+@read_only
+def api_show_artist(artist_id):
+    return api_response(f'artist:{artist_id}', lambda: cache.get_or_set(
+        f'artist:{artist_id}', lambda: get_artist_data(artist_id)))
+
+
+@app.route('/api/v1/artists/search')
+@read_only
+def api_search_artists():
+    search_term = request.args.get('search_term', '')
+    return api_response(None, lambda: get_search_results(Artist, search_term))
+
+
+@app.route('/api/v1/shows')
+@read_only
+def api_shows():
+    if request.args:
+        return api_response(None, lambda: get_shows_page(request.args))
+    return api_response('shows', lambda: cache.get_or_set(
+        'shows', lambda: get_shows_page({})))
+
+
+@app.route('/api/v1/calendar')
+@read_only
+def api_calendar():
+    return api_response(None, lambda: get_calendar_shows(request.args))
+
+
+@app.route('/api/v1/calendar/counts')
+@read_only
+def api_calendar_counts():
+    return api_response(None, lambda: get_calendar_counts(request.args))
+
+
+@app.route('/api/v1/venues/batch', methods=['POST'])
+def api_batch_venues():
+    return batch_edit_response('venues')
+
+
+@app.route('/api/v1/artists/batch', methods=['POST'])
+def api_batch_artists():
+    return batch_edit_response('artists')
+
+
+@app.route('/api/v1/availability', methods=['POST'])
+def api_availability():
+    # checks many candidate show slots at once, on the primary so a slot
+    # booked a moment ago never shows as available, e.g.
+    # {"slots": [{"venue_id": 1, "artist_id": 2,
+    #             "start_time": "2030-01-01T20:00:00", "duration_minutes": 90}]}
+    payload = request.get_json(silent=True) or {}
+    raw_slots = payload.get('slots')
+    if not isinstance(raw_slots, list) or not raw_slots \
+            or len(raw_slots) > app.config['AVAILABILITY_MAX_SLOTS']:
+        abort(400)
+
+    try:
+        slots = [{
+            'venue_id': int(x['venue_id']),
+            'artist_id': int(x['artist_id']),
+            'start_time': parse_utc_datetime(x['start_time']),
+            'duration_minutes': int(x.get('duration_minutes', 120))
+        } for x in raw_slots]
+    except (KeyError, TypeError, ValueError, OverflowError):
+        abort(400)
+    if any(not 1 <= x['duration_minutes'] <= MAX_SHOW_DURATION_MINUTES
+           for x in slots):
+        abort(400)
+
+    conflicts = find_booking_conflicts(slots)
+    return Response(dumps_json({
+        'slots': [{
+            'available': not slot_conflicts,
+            'conflicts': slot_conflicts
+        } for slot_conflicts in conflicts]
+    }), mimetype='application/json')
+
+
+#  Metrics
+#  ----------------------------------------------------------------
+
+@app.route('/metrics')
+def metrics():
+    return Response(
+        render_pool_metrics(db.engine.pool),
+        mimetype='text/plain; version=0.0.4'
+    )
+
+
+#  Commands
+#  ----------------------------------------------------------------
+
+@app.cli.command('roll-over-shows')
+def roll_over_shows():
+    # Moves shows that have started since the last run from the upcoming
+    # to the past counters. Meant to be run periodically (e.g. from cron),
+    # only rows whose next show has passed are recomputed.
+    now = datetime.utcnow()
+    for model in (Venue, Artist):
+        table = model.__tablename__
+        result = db.session.execute(
+            f'SELECT refresh_{table.lower()}_show_counters(id) '
+            f'FROM "{table}" WHERE next_show_time <= :now',
+            {'now': now}
+        )
+        click.echo(f'Refreshed show counters for {result.rowcount} {table} rows')
+
+    db.session.commit()
+    evict_cached_pages('venues', 'artists')
+
+
+IMPORT_COLUMNS = {
+    'venues': (Venue, VenueForm, [
+        'name', 'city', 'state', 'address', 'phone', 'genres', 'image_link',
+        'facebook_link', 'website', 'seeking_talent', 'seeking_description'
+    ]),
+    'artists': (Artist, ArtistForm, [
+        'name', 'city', 'state', 'phone', 'genres', 'image_link',
+        'facebook_link', 'website', 'seeking_venue', 'seeking_description'
+    ]),
+    'shows': (Show, ShowForm, [
+        'artist_id', 'venue_id', 'start_time', 'duration_minutes'
+    ]),
+}
+
+
+def resolve_show_references(chunk):
+    # Shows may reference their artist and venue by id or by exact name,
+    # soft-deleted listings count as unknown. Both are resolved for the
+    # whole chunk with one query per table.
+    errors = [
+        (line_number, 'start_time is required')
+        for line_number, record in chunk if not record.get('start_time')
+    ]
+    for model, key in ((Artist, 'artist'), (Venue, 'venue')):
+        names = {
+            record[f'{key}_name'] for _, record in chunk
+            if not record.get(f'{key}_id') and record.get(f'{key}_name')
+        }
+        ids = {
+            int(record[f'{key}_id']) for _, record in chunk
+            if str(record.get(f'{key}_id') or '').isdigit()
+        }
+
+        ids_by_name = {}
+        for x in db.session.query(model.id, model.name).filter(
+            db.or_(model.name.in_(names), model.id.in_(ids)),
+            model.deleted_at.is_(None)
+        ):
+            if x.name in names:
+                ids_by_name.setdefault(x.name, []).append(x.id)
+            ids.discard(x.id)
+        missing_ids = ids
+
+        for line_number, record in chunk:
+            if record.get(f'{key}_id'):
+                value = str(record[f'{key}_id'])
+                if not value.isdigit() or int(value) in missing_ids:
+                    errors.append(
+                        (line_number, f'unknown {key}_id {value}'))
+            else:
+                matches = ids_by_name.get(record.get(f'{key}_name'), [])
+                if len(matches) == 1:
+                    record[f'{key}_id'] = matches[0]
+                else:
+                    errors.append((
+                        line_number,
+                        f'{len(matches)} {key}s named {record.get(f"{key}_name")!r}'
+                    ))
+
+    return errors
+
+
+@app.cli.command('import-data')
+@click.argument('kind', type=click.Choice(sorted(IMPORT_COLUMNS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--chunk-size', default=1000, show_default=True)
+def import_data(kind, path, chunk_size):
+    # Bulk loads venues, artists or shows from a CSV or NDJSON file. Rows
+    # are validated with the HTML forms and written with one multi-row
+    # INSERT per chunk, or row by row if the database refuses the chunk.
+    model, form_class, columns = IMPORT_COLUMNS[kind]
+
+    def insert_rows(rows):
+        try:
+            db.session.execute(model.__table__.insert().values(rows))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        if kind == 'shows':
+            evict_cached_pages(
+                venue_ids={x['venue_id'] for x in rows},
+                artist_ids={x['artist_id'] for x in rows}
+            )
+
+    report = import_records(
+        read_records(path),
+        form_class,
+        columns,
+        insert_rows,
+        prepare_chunk=resolve_show_references if kind == 'shows' else None,
+        chunk_size=chunk_size
+    )
+    evict_cached_pages('venues', 'artists', 'shows')
+    click.echo(str(report))
+
+
+@app.cli.command('export-data')
+@click.argument('kind', type=click.Choice(['venues', 'artists', 'shows']))
+@click.argument('path', type=click.Path(dir_okay=False))
+@click.option('--format', 'export_format', default='csv', show_default=True,
+              type=click.Choice(sorted(EXPORT_FORMATS) + ['parquet']))
+@click.option('--since', type=click.DateTime(),
+              help='Only export rows changed at or after this time (UTC).')
+def export_data(kind, path, export_format, since):
+    # Nightly analytics dump of the catalog, written row by row.
+    query = get_export_query(kind, since)
+    columns = get_export_columns(query)
+
+    if export_format == 'parquet':
+        try:
+            write_parquet(path, columns, query)
+        except ImportError:
+            raise click.ClickException('Parquet export requires pyarrow')
+    else:
+        writer, _ = EXPORT_FORMATS[export_format]
+        with open(path, 'w', newline='') as f:
+            for chunk in writer(columns, query):
+                f.write(chunk)
+
+    click.echo(f'Exported {kind} to {path}')
+
+
+def insert_chunks(model, rows, chunk_size):
+    ids = []
+    for chunk in chunked(rows, chunk_size):
+        result = db.session.execute(
+            model.__table__.insert().values(chunk).returning(model.id))
+        ids += [x[0] for x in result]
+    return ids
+
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    # Fingerprints and pre-compresses static/ for url_for('assets', ...),
+    # run on deploy before the workers start
+    manifest = build_assets(app.static_folder, assets.build_folder)
+    compressed = sum(1 for x in manifest.values() if x['encodings'])
+    click.echo(f'Built {len(manifest)} assets, {compressed} pre-compressed')
+
+
+@app.cli.command('seed')
+@click.option('--venues', 'venue_count', default=100, show_default=True)
+@click.option('--artists', 'artist_count', default=200, show_default=True)
+@click.option('--shows', 'show_count', default=1000, show_default=True)
+@click.option('--past-ratio', default=0.5, show_default=True,
+              help='Share of the shows that are in the past.')
+@click.option('--random-seed', default=0, show_default=True)
+@click.option('--chunk-size', default=1000, show_default=True)
+def seed(venue_count, artist_count, show_count, past_ratio, random_seed,
+         chunk_size):
+    # Adds a synthetic, reproducible catalog for development and
+    # benchmarking. The show counter triggers apply each chunk as one set
+    # of deltas.
+    rng = random.Random(random_seed)
+
+    venue_ids = insert_chunks(
+        Venue, generate_venues(venue_count, rng), chunk_size)
+    artist_ids = insert_chunks(
+        Artist, generate_artists(artist_count, rng), chunk_size)
+    insert_chunks(Show, generate_shows(
+        show_count, venue_ids, artist_ids, rng, past_ratio), chunk_size)
+    db.session.commit()
+
+    evict_cached_pages('venues', 'artists', 'shows')
+    click.echo(
+        f'Seeded {venue_count} venues, {artist_count} artists '
+        f'and {show_count} shows')
+
+
 @app.errorhandler(404)
 def not_found_error(error):
     return render_template('errors/404.html'), 404
@@ -578,17 +1979,6 @@ def server_error(error):
     return render_template('errors/500.html'), 500
 
 
-if not app.debug:
-    file_handler = FileHandler('error.log')
-    file_handler.setFormatter(
-        Formatter(
-            '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
-    )
-    app.logger.setLevel(logging.INFO)
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-    app.logger.info('errors')
-
 #----------------------------------------------------------------------------#
 # Launch.
 #----------------------------------------------------------------------------#
@@ -0,0 +1,146 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST = 'manifest.json'
+# Text formats worth compressing, images and woff fonts already are
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.map', '.ttf', '.otf', '.eot'}
+# Fingerprinted URLs change with the content, browsers never need to revalidate
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+# ---------------------
+# Build
+# ---------------------
+
+def fingerprint(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def build_assets(static_folder, build_folder):
+    # Hashes every file under static_folder and writes gzip (and, with the
+    # brotli package installed, brotli) variants of the text formats to
+    # build_folder, next to a manifest of
+    #   {"css/main.css": {"version": "3f2a9c1b0d4e", "encodings": ["br", "gzip"]}}
+    # Files whose hash is unchanged since the last build are not
+    # compressed again.
+    static_folder = os.path.abspath(static_folder)
+    build_folder = os.path.abspath(build_folder)
+    previous = load_manifest(build_folder)
+    manifest = {}
+
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = [x for x in dirs if os.path.join(root, x) != build_folder]
+        for name in files:
+            path = os.path.join(root, name)
+            filename = os.path.relpath(path, static_folder).replace(os.sep, '/')
+            version = fingerprint(path)
+
+            encodings = []
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE:
+                if previous.get(filename, {}).get('version') == version:
+                    encodings = previous[filename]['encodings']
+                else:
+                    encodings = compress(path, os.path.join(build_folder, filename))
+
+            manifest[filename] = {'version': version, 'encodings': encodings}
+
+    os.makedirs(build_folder, exist_ok=True)
+    manifest_path = os.path.join(build_folder, MANIFEST)
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(manifest_path + '.tmp', manifest_path)
+
+    return manifest
+
+
+def compress(path, target):
+    # Writes target.gz and target.br, keeping only variants that are
+    # actually smaller, and returns their encodings in preference order.
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    variants = [('gzip', '.gz', lambda x: gzip.compress(x, 9, mtime=0))]
+    if brotli is not None:
+        variants.insert(0, ('br', '.br', lambda x: brotli.compress(x, quality=11)))
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    encodings = []
+    for encoding, suffix, compressor in variants:
+        compressed = compressor(data)
+        if len(compressed) < len(data):
+            with open(target + suffix, 'wb') as f:
+                f.write(compressed)
+            encodings.append(encoding)
+    return encodings
+
+
+def load_manifest(build_folder):
+    try:
+        with open(os.path.join(build_folder, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+# ---------------------
+# Serving
+# ---------------------
+
+class Assets:
+    # Serves static files under /static/v/<version>/<filename>, built with
+    # url_for('assets', filename='css/main.css'). The version is filled in
+    # from the build manifest, so the URL changes whenever the file does and
+    # responses can be cached forever. Without a build (or for files added
+    # since) the version is 'dev' and responses get the default caching.
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.static_folder = app.static_folder
+        self.build_folder = app.config.get(
+            'ASSETS_BUILD_DIR', os.path.join(app.static_folder, 'build'))
+        self.manifest = load_manifest(self.build_folder)
+
+        app.add_url_rule(
+            f'{app.static_url_path}/v/<version>/<path:filename>',
+            'assets', self.send)
+        app.url_defaults(self.add_version)
+
+    def add_version(self, endpoint, values):
+        if endpoint == 'assets' and 'version' not in values:
+            entry = self.manifest.get(values.get('filename'))
+            values['version'] = entry['version'] if entry else 'dev'
+
+    def send(self, version, filename):
+        entry = self.manifest.get(filename)
+        if not entry or entry['version'] != version:
+            return send_from_directory(self.static_folder, filename)
+
+        for encoding in entry['encodings']:
+            if encoding in request.accept_encodings:
+                suffix = '.br' if encoding == 'br' else '.gz'
+                response = send_from_directory(
+                    self.build_folder, filename + suffix,
+                    mimetype=mimetypes.guess_type(filename)[0])
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response = send_from_directory(self.static_folder, filename)
+
+        if entry['encodings']:
+            response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = IMMUTABLE
+        return response
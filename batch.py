@@ -0,0 +1,133 @@
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from importer import get_field_names, to_formdata
+
+
+# ---------------------
+# Validation
+# ---------------------
+
+class BatchItem:
+    # One entry of a batch edit: a partial update when it names an id,
+    # otherwise a new row. `values` holds the validated column values the
+    # item sets, `result` is what the API reports back for it.
+    def __init__(self, index, item_id, fields):
+        self.index = index
+        self.id = item_id
+        self.fields = fields
+        self.values = {}
+        self.version = None
+        self.status = None
+        self.errors = None
+
+    def fail(self, status, errors):
+        self.status = status
+        self.errors = errors
+
+    @property
+    def result(self):
+        result = {'index': self.index, 'id': self.id, 'status': self.status}
+        if self.version is not None:
+            result['version'] = self.version
+        if self.errors:
+            result['errors'] = self.errors
+        return result
+
+
+def validate_batch(items, form_class, columns, current):
+    # Validates every item with the same form used by the HTML submission.
+    # Partial updates are merged over the current row (`current` maps ids
+    # to column dicts) so the form rules see the complete entity, but only
+    # the fields the item names are written. An update may name the
+    # `version` it was based on to be rejected if the row changed since.
+    list_fields = get_field_names(form_class, 'SelectMultipleField')
+    boolean_fields = get_field_names(form_class, 'BooleanField')
+
+    batch, seen = [], set()
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            entry = BatchItem(index, None, [])
+            entry.fail('invalid', {'item': ['Must be an object.']})
+            batch.append(entry)
+            continue
+
+        fields = [x for x in item if x not in ('id', 'version')]
+        entry = BatchItem(index, item.get('id'), fields)
+        entry.version = item.get('version')
+        batch.append(entry)
+
+        unknown = [x for x in fields if x not in columns]
+        if unknown:
+            entry.fail('invalid', {x: ['Unknown field.'] for x in unknown})
+            continue
+        if 'id' in item and type(entry.id) is not int:
+            entry.fail('invalid', {'id': ['Must be an integer.']})
+            continue
+        if 'version' in item and (entry.id is None or type(entry.version) is not int):
+            entry.fail('invalid', {'version': ['Must be an integer, for updates only.']})
+            continue
+        if entry.id is not None and entry.id in seen:
+            entry.fail('invalid', {'id': ['Appears more than once in the batch.']})
+            continue
+        seen.add(entry.id)
+
+        if entry.id is None:
+            record = item
+        elif entry.id in current:
+            record = {**current[entry.id], **item}
+        else:
+            entry.fail('not_found', None)
+            continue
+
+        form = form_class(
+            to_formdata(record, list_fields, boolean_fields), meta={'csrf': False})
+        if not form.validate():
+            entry.fail('invalid', form.errors)
+            continue
+
+        written = columns if entry.id is None else fields
+        entry.values = {x: form[x].data for x in written}
+
+    return batch
+
+
+# ---------------------
+# Statements
+# ---------------------
+
+def update_from_values(session, table, rows, key='id', version=None):
+    # Applies rows that all set the same columns with a single
+    # UPDATE ... FROM (VALUES ...) statement and returns (key, version) for
+    # the updated rows. With a version column the statement bumps it, and
+    # rows that carry a version are only applied if it is still current.
+    # Values are cast to the column types, Postgres cannot infer array or
+    # boolean types from untyped VALUES parameters.
+    names = [key, *[x for x in rows[0] if x != key]]
+    columns = [x for x in names if x not in (key, version)]
+    dialect = postgresql.dialect()
+    types = {x: table.c[x].type.compile(dialect=dialect) for x in names}
+
+    values, params = [], {}
+    for i, row in enumerate(rows):
+        placeholders = []
+        for j, name in enumerate(names):
+            params[f'p{i}_{j}'] = row[name]
+            placeholders.append(f'CAST(:p{i}_{j} AS {types[name]})')
+        values.append(f'({", ".join(placeholders)})')
+
+    assignments = [f'"{x}" = v."{x}"' for x in columns]
+    conditions = [f't."{key}" = v."{key}"']
+    if version:
+        assignments.append(f'"{version}" = t."{version}" + 1')
+        if version in names:
+            conditions.append(f't."{version}" = v."{version}"')
+
+    statement = text(f"""
+        UPDATE "{table.name}" AS t
+        SET {', '.join(assignments)}
+        FROM (VALUES {', '.join(values)}) AS v ({', '.join(f'"{x}"' for x in names)})
+        WHERE {' AND '.join(conditions)}
+        RETURNING t."{key}", {f't."{version}"' if version else 'NULL'}
+    """)
+    return session.execute(statement, params).fetchall()
@@ -0,0 +1,58 @@
+# Compares the original `datetime` Jinja filter, which received ISO strings
+# and re-parsed them before handing them to babel, with the formatting
+# module that works on native datetimes and compiled patterns.
+#
+#   $ python benchmarks/datetime_formatting.py [number of shows]
+
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+import babel.dates
+import dateutil.parser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from formatting import (  # noqa: E402
+    convert_datetime_to_string, format_datetime, format_datetimes
+)
+
+
+def legacy_format_datetime(value, format='medium'):
+    date = dateutil.parser.parse(value)
+    if format == 'full':
+        format = "EEEE MMMM, d, y 'at' h:mma"
+    elif format == 'medium':
+        format = "EE MM, dd, y h:mma"
+    return babel.dates.format_datetime(date, format)
+
+
+def main(count):
+    start = datetime(2020, 5, 21, 21, 30)
+    start_times = [start + timedelta(hours=6 * i) for i in range(count)]
+    legacy_values = [convert_datetime_to_string(x) for x in start_times]
+
+    assert [legacy_format_datetime(x, 'full') for x in legacy_values] == \
+        [format_datetime(x, 'full') for x in start_times] == \
+        format_datetimes(start_times, 'full')
+
+    runs = {
+        'string round trip': lambda: [
+            legacy_format_datetime(convert_datetime_to_string(x), 'full')
+            for x in start_times
+        ],
+        'native filter': lambda: [
+            format_datetime(x, 'full') for x in start_times
+        ],
+        'batch': lambda: format_datetimes(start_times, 'full'),
+    }
+
+    print(f'Formatting {count} show start times (best of 5):')
+    for name, run in runs.items():
+        best = min(timeit.repeat(run, number=10, repeat=5)) / 10
+        print(f'  {name:<20} {best * 1000:8.2f} ms')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,320 @@
+# Latency and query-count benchmark for every page and API route.
+#
+# Drives the app in-process through the Flask test client, or a running
+# server over HTTP, and reports p50/p95/p99 latency and queries per request
+# (read from the Server-Timing header added by the query profiler). Seed a
+# dataset first, e.g. `flask seed --venues 500 --artists 2000 --shows 50000`.
+#
+#   $ python benchmarks/run.py --save benchmarks/baseline.json
+#   $ python benchmarks/run.py --compare benchmarks/baseline.json
+#   $ python benchmarks/run.py --url http://localhost:5000 --concurrency 16
+
+import argparse
+import itertools
+import json
+import os
+import re
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+# ---------------------
+# Drivers
+# ---------------------
+
+class JSONBody:
+    # Route data sent as a JSON request body instead of a form
+    def __init__(self, payload):
+        self.payload = payload
+
+
+class TestClientDriver:
+    def __init__(self):
+        # Measure the database paths, not the page cache, and count queries
+        os.environ.setdefault('CACHE_BACKEND', 'null')
+        os.environ['QUERY_PROFILER'] = '1'
+        sys.path.insert(0, ROOT)
+
+        from app import app
+        app.config['WTF_CSRF_ENABLED'] = False
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None):
+        if isinstance(data, JSONBody):
+            kwargs = {'json': data.payload}
+        else:
+            kwargs = {'data': data}
+
+        start = time.perf_counter()
+        response = self.client.open(path, method=method, **kwargs)
+        body = response.get_data()
+        elapsed = time.perf_counter() - start
+        return response.status_code, elapsed, response.headers, body
+
+
+class HTTPDriver:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, data=None):
+        headers = {}
+        if isinstance(data, JSONBody):
+            data = json.dumps(data.payload).encode()
+            headers['Content-Type'] = 'application/json'
+        elif data is not None:
+            data = urllib.parse.urlencode(data, doseq=True).encode()
+
+        req = urllib.request.Request(
+            self.base_url + path, data=data, headers=headers, method=method)
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req) as response:
+                body = response.read()
+                status, headers = response.status, response.headers
+        except urllib.error.HTTPError as e:
+            body, status, headers = e.read(), e.code, e.headers
+        return status, time.perf_counter() - start, headers, body
+
+
+# ---------------------
+# Routes
+# ---------------------
+
+# Form fields shared by the listings the write routes create
+LISTING_FORM = {
+    'city': 'Benchmark', 'state': 'CA', 'genres': ['Jazz'],
+    'facebook_link': 'https://www.facebook.com/bench',
+    'website': 'https://bench.example.com',
+}
+
+
+def create_listing(driver, kind, name):
+    # Creates a venue or artist through its form and returns the new id
+    data = dict(LISTING_FORM, name=name)
+    if kind == 'venues':
+        data['address'] = '1 Main Street'
+    driver.request('POST', f'/{kind}/create', data)
+    _, _, _, body = driver.request(
+        'GET', f'/api/v1/{kind}/search?' + urllib.parse.urlencode({'search_term': name}))
+    return json.loads(body)['data'][0]['id']
+
+
+def build_routes(driver, include_writes):
+    _, _, _, body = driver.request('GET', '/api/v1/venues')
+    venue_id = json.loads(body)[0]['venues'][0]['id']
+    _, _, _, body = driver.request('GET', '/api/v1/artists')
+    artist_id = json.loads(body)[0]['id']
+    _, _, _, body = driver.request('GET', '/api/v1/shows')
+    cursor = json.loads(body)['next_cursor'] or ''
+
+    routes = [
+        ('home', 'GET', '/', None),
+        ('venues', 'GET', '/venues', None),
+        ('search_venues', 'POST', '/venues/search', {'search_term': 'blue'}),
+        ('show_venue', 'GET', f'/venues/{venue_id}', None),
+        ('edit_venue', 'GET', f'/venues/{venue_id}/edit', None),
+        ('create_venue_form', 'GET', '/venues/create', None),
+        ('artists', 'GET', '/artists', None),
+        ('browse_artists', 'GET', '/artists?genre=Jazz&seeking=1', None),
+        ('search_artists', 'POST', '/artists/search', {'search_term': 'band'}),
+        ('show_artist', 'GET', f'/artists/{artist_id}', None),
+        ('edit_artist', 'GET', f'/artists/{artist_id}/edit', None),
+        ('create_artist_form', 'GET', '/artists/create', None),
+        ('shows', 'GET', '/shows', None),
+        ('shows_next_page', 'GET', f'/shows?after={cursor}', None),
+        ('create_show_form', 'GET', '/shows/create', None),
+        ('api_venues', 'GET', '/api/v1/venues', None),
+        ('api_show_venue', 'GET', f'/api/v1/venues/{venue_id}', None),
+        ('api_search_venues', 'GET', '/api/v1/venues/search?search_term=blue', None),
+        ('api_artists', 'GET', '/api/v1/artists', None),
+        ('api_venue_facets', 'GET', '/api/v1/venues/facets?genre=Jazz', None),
+        ('api_show_artist', 'GET', f'/api/v1/artists/{artist_id}', None),
+        ('api_search_artists', 'GET', '/api/v1/artists/search?search_term=band', None),
+        ('api_shows', 'GET', '/api/v1/shows', None),
+        ('stream_shows', 'GET', f'/shows/stream?venue_id={venue_id}', None),
+        ('calendar', 'GET', '/calendar', None),
+        ('api_calendar', 'GET', '/api/v1/calendar', None),
+        ('api_calendar_counts', 'GET', '/api/v1/calendar/counts', None),
+        ('api_artist_facets', 'GET', '/api/v1/artists/facets?genre=Jazz', None),
+        ('api_artist_matches', 'GET', f'/api/v1/artists/{artist_id}/matches', None),
+        ('api_venue_matches', 'GET', f'/api/v1/venues/{venue_id}/matches', None),
+        ('api_availability', 'POST', '/api/v1/availability', JSONBody({'slots': [{
+            'venue_id': venue_id, 'artist_id': artist_id,
+            'start_time': '2030-01-01T20:00:00', 'duration_minutes': 120,
+        }]})),
+        ('export_venues', 'GET', '/export/venues', None),
+        ('export_artists', 'GET', '/export/artists', None),
+        ('export_shows', 'GET', '/export/shows?format=ndjson', None),
+        ('metrics', 'GET', '/metrics', None),
+    ]
+
+    if include_writes:
+        # Shows are booked for a venue and an artist created for this run,
+        # a day apart, so every request inserts a show instead of hitting
+        # the booking exclusion constraints of an earlier one.
+        run = uuid.uuid4().hex[:8]
+        show_venue_id = create_listing(driver, 'venues', f'Benchmark Stage {run}')
+        show_artist_id = create_listing(driver, 'artists', f'Benchmark Act {run}')
+        show_days = itertools.count()
+
+        def new_show():
+            start_time = datetime(2030, 1, 1, 20) + timedelta(days=next(show_days))
+            return {
+                'artist_id': show_artist_id, 'venue_id': show_venue_id,
+                'start_time': start_time.strftime('%Y-%m-%d %H:%M:%S'),
+            }
+
+        def edit_form(kind, listing_id, **fields):
+            # the edit has to name the current version to be applied
+            def data():
+                _, _, _, body = driver.request('GET', f'/api/v1/{kind}/{listing_id}')
+                return dict(LISTING_FORM, version=json.loads(body)['version'], **fields)
+            return data
+
+        def new_listing_path(kind):
+            # every delete removes a listing created for it
+            def path():
+                name = f'Benchmark Closing {uuid.uuid4().hex}'
+                return f'/{kind}/{create_listing(driver, kind, name)}'
+            return path
+
+        def batch_edit(listing_id, field):
+            values = itertools.cycle([True, False])
+            return lambda: JSONBody({'items': [{'id': listing_id, field: next(values)}]})
+
+        routes += [
+            ('create_venue', 'POST', '/venues/create',
+             dict(LISTING_FORM, name='Benchmark Hall', address='1 Main Street')),
+            ('create_artist', 'POST', '/artists/create',
+             dict(LISTING_FORM, name='Benchmark Band')),
+            ('create_show', 'POST', '/shows/create', new_show),
+            ('edit_venue_submission', 'POST', f'/venues/{show_venue_id}/edit',
+             edit_form('venues', show_venue_id,
+                       name=f'Benchmark Stage {run}', address='1 Main Street')),
+            ('edit_artist_submission', 'POST', f'/artists/{show_artist_id}/edit',
+             edit_form('artists', show_artist_id, name=f'Benchmark Act {run}')),
+            ('api_batch_venues', 'POST', '/api/v1/venues/batch',
+             batch_edit(show_venue_id, 'seeking_talent')),
+            ('api_batch_artists', 'POST', '/api/v1/artists/batch',
+             batch_edit(show_artist_id, 'seeking_venue')),
+            ('delete_venue', 'DELETE', new_listing_path('venues'), None),
+            ('delete_artist', 'DELETE', new_listing_path('artists'), None),
+        ]
+
+    return routes
+
+
+# ---------------------
+# Measurement
+# ---------------------
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def measure(driver, route, iterations, concurrency):
+    # path and data may be functions, called before every request for a
+    # fresh target or payload
+    _, method, path, data = route
+
+    def run(_):
+        status, elapsed, headers, _ = driver.request(
+            method,
+            path() if callable(path) else path,
+            data() if callable(data) else data)
+        match = SERVER_TIMING_QUERIES.search(headers.get('Server-Timing', ''))
+        return status, elapsed, int(match.group(1)) if match else None
+
+    # one warm-up request so template compilation is not measured
+    run(None)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        samples = list(executor.map(run, range(iterations)))
+
+    latencies = [x[1] * 1000 for x in samples]
+    queries = [x[2] for x in samples if x[2] is not None]
+    return {
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'queries': round(sum(queries) / len(queries), 1) if queries else None,
+        'errors': sum(1 for x in samples if x[0] >= 500),
+    }
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {before['p95_ms']} -> {result['p95_ms']} ms")
+        if (result['queries'] is not None and before['queries'] is not None
+                and result['queries'] > before['queries']):
+            regressions.append(
+                f"{name}: queries {before['queries']} -> {result['queries']}")
+        if result['errors'] > before['errors']:
+            regressions.append(
+                f"{name}: errors {before['errors']} -> {result['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', help='benchmark a running server instead')
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--include-writes', action='store_true',
+                        help='also run the create, edit, batch and delete '
+                             'routes (test client only)')
+    parser.add_argument('--save', help='write the results to this file')
+    parser.add_argument('--compare', help='baseline results to compare to')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed relative p95 increase')
+    args = parser.parse_args()
+
+    driver = HTTPDriver(args.url) if args.url else TestClientDriver()
+    routes = build_routes(driver, args.include_writes and not args.url)
+
+    results = {}
+    print(f"{'route':<22}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}")
+    for route in routes:
+        result = measure(driver, route, args.iterations, args.concurrency)
+        results[route[0]] = result
+        print(f"{route[0]:<22}{result['p50_ms']:>9}{result['p95_ms']:>9}"
+              f"{result['p99_ms']:>9}{str(result['queries']):>9}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        if not os.path.exists(args.compare):
+            # first run on this machine, later runs compare against it
+            print(f'No baseline at {args.compare}, saving this run as the baseline')
+            with open(args.compare, 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            return
+
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
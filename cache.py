@@ -0,0 +1,122 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+
+# ---------------------
+# Cache backends
+# ---------------------
+
+class BaseCache:
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def delete(self, *keys):
+        raise NotImplementedError
+
+    def get_or_set(self, key, builder):
+        # Returns the cached value for key, building and storing it on a
+        # miss. Builders returning None (e.g. missing entities) are not
+        # cached so a later insert is picked up immediately.
+        value = self.get(key)
+        if value is None:
+            value = builder()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+
+class NullCache(BaseCache):
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+
+class LRUCache(BaseCache):
+    # In-process cache, one per worker. Entries expire after ttl seconds and
+    # the least recently used entry is dropped once max_entries is reached.
+
+    def __init__(self, max_entries=1024, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+class RedisCache(BaseCache):
+    # Cache shared by every worker. Works with any client exposing the
+    # redis-py get/set/delete methods, which makes it easy to run against
+    # an in-memory fake. Values are pickled so view-models keep their
+    # native types (e.g. datetimes).
+
+    def __init__(self, client, ttl=60, prefix='fyyur:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        import redis
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        return pickle.loads(raw)
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=self.ttl)
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+
+
+def create_cache(config):
+    backend = config.get('CACHE_BACKEND', 'memory')
+    ttl = config.get('CACHE_TTL', 60)
+
+    if backend == 'memory':
+        return LRUCache(max_entries=config.get('CACHE_MAX_ENTRIES', 1024), ttl=ttl)
+    elif backend == 'redis':
+        return RedisCache.from_url(config['CACHE_REDIS_URL'], ttl=ttl)
+    elif backend == 'null':
+        return NullCache()
+
+    raise ValueError(f'Unknown cache backend {backend}')
@@ -1,4 +1,5 @@
 import os
+from db_pool import TimedQueuePool
 SECRET_KEY = os.urandom(32)
 # Grabs the folder where the script runs.
 basedir = os.path.abspath(os.path.dirname(__file__))
@@ -7,7 +8,104 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 DEBUG = True
 
 # Connect to the database
-SQLALCHEMY_DATABASE_URI = 'postgres://fyyur@localhost:5432/fyyur'
+SQLALCHEMY_DATABASE_URI = os.environ.get(
+    'DATABASE_URL', 'postgres://fyyur@localhost:5432/fyyur')
+
+# Connection pool, per worker process. See "Database connection pool" in
+# the README for sizing per worker model.
+SQLALCHEMY_ENGINE_OPTIONS = {
+    'poolclass': TimedQueuePool,
+    'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+    'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+    'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+    # Drop connections killed by a database restart before handing them out
+    'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') == '1',
+    'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+    'connect_args': {
+        'options': f"-c statement_timeout={int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))}"
+    },
+}
+
+# Read replicas, comma separated. Read-only views are spread over them
+# while writes always go to the primary.
+SQLALCHEMY_BINDS = {
+    f'replica_{i}': url for i, url in enumerate(
+        x for x in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if x
+    )
+}
+SQLALCHEMY_REPLICA_BINDS = list(SQLALCHEMY_BINDS)
+
+# After a write, a client keeps reading from the primary for this many
+# seconds so replication lag never hides their own changes
+READ_YOUR_WRITES_SECONDS = int(os.environ.get('READ_YOUR_WRITES_SECONDS', 5))
 
 # Disable performance warnings
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Number of shows rendered per page on /shows
+SHOWS_PER_PAGE = 30
+
+# Rows fetched per round trip when streaming the show listing
+SHOWS_STREAM_CHUNK_SIZE = 1000
+
+# Maximum number of venues or artists returned by a search
+SEARCH_RESULTS_LIMIT = 50
+
+# Server-side cache for the read-heavy pages: 'memory' (per worker LRU),
+# 'redis' (shared between workers) or 'null' (disabled)
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+CACHE_TTL = int(os.environ.get('CACHE_TTL', 60))
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+
+# Rows fetched per round trip by the catalog exports
+EXPORT_CHUNK_SIZE = 5000
+
+# Per-request SQL profiling: Server-Timing header, a log line per request
+# and detection of repeated (N+1) statements. In strict mode a request
+# issuing more than QUERY_BUDGET statements fails, which is meant for tests.
+QUERY_PROFILER = os.environ.get('QUERY_PROFILER', '0') == '1'
+QUERY_PROFILER_REPEAT_THRESHOLD = 5
+QUERY_PROFILER_STRICT = os.environ.get('QUERY_PROFILER_STRICT', '0') == '1'
+QUERY_BUDGET = int(os.environ.get('QUERY_BUDGET', 20))
+
+# Logging: JSON lines written by a background thread to a rotated file.
+# Identical messages beyond LOG_RATE_LIMIT per LOG_RATE_LIMIT_WINDOW
+# seconds are dropped and counted.
+LOG_FILE = os.environ.get('LOG_FILE', os.path.join(basedir, 'error.log'))
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+LOG_QUEUE_SIZE = 10000
+LOG_RATE_LIMIT = 10
+LOG_RATE_LIMIT_WINDOW = 60
+
+# Longest window, in days, served by the calendar views
+CALENDAR_MAX_DAYS = 62
+
+# Most candidate slots accepted by one availability check
+AVAILABILITY_MAX_SLOTS = 500
+
+# Most creates and updates accepted by one batch edit request
+BATCH_MAX_ITEMS = 500
+
+# Seconds the venue and artist browse facet counts are reused for a filter set
+FACET_CACHE_TTL = int(os.environ.get('FACET_CACHE_TTL', 10))
+
+# Venue/artist match index: seconds between incremental refreshes of the
+# listings and between full rebuilds (which also reload the show history)
+MATCH_REFRESH_SECONDS = int(os.environ.get('MATCH_REFRESH_SECONDS', 30))
+MATCH_REBUILD_SECONDS = int(os.environ.get('MATCH_REBUILD_SECONDS', 3600))
+MATCH_RESULTS_LIMIT = 50
+
+# Compiled templates are kept here across restarts and loaded at startup
+JINJA_BYTECODE_CACHE_DIR = os.environ.get(
+    'JINJA_BYTECODE_CACHE_DIR', os.path.join(basedir, '.jinja_cache'))
+TEMPLATE_PRECOMPILE = os.environ.get('TEMPLATE_PRECOMPILE', '1') == '1'
+
+# Rendered {% cache %} fragments (show tiles, listing headers) per worker
+FRAGMENT_CACHE_MAX_ENTRIES = int(os.environ.get('FRAGMENT_CACHE_MAX_ENTRIES', 10000))
+FRAGMENT_CACHE_TTL = 24 * 60 * 60
+
+# Output of `flask build-assets`: manifest and pre-compressed static files
+ASSETS_BUILD_DIR = os.environ.get(
+    'ASSETS_BUILD_DIR', os.path.join(basedir, 'static', 'build'))
@@ -0,0 +1,64 @@
+import threading
+import time
+
+from sqlalchemy.pool import QueuePool
+
+# Upper bounds (in seconds) of the checkout latency histogram buckets
+CHECKOUT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+
+
+class CheckoutTimer:
+    def __init__(self, buckets=CHECKOUT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    self.counts[i] += 1
+
+
+class TimedQueuePool(QueuePool):
+    # QueuePool that records how long callers wait for a connection, which
+    # is where pool exhaustion shows up first.
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_timer = CheckoutTimer()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            self.checkout_timer.observe(time.perf_counter() - start)
+
+
+def render_pool_metrics(pool, prefix='fyyur_db_pool'):
+    # Prometheus text exposition of the pool state for this worker process.
+    lines = [
+        f'{prefix}_size {pool.size()}',
+        f'{prefix}_checked_in {pool.checkedin()}',
+        f'{prefix}_checked_out {pool.checkedout()}',
+        f'{prefix}_overflow {max(pool.overflow(), 0)}',
+    ]
+
+    timer = getattr(pool, 'checkout_timer', None)
+    if timer:
+        name = f'{prefix}_checkout_seconds'
+        lines.append(f'# TYPE {name} histogram')
+        for bound, count in zip(timer.buckets, timer.counts):
+            lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+        lines += [
+            f'{name}_bucket{{le="+Inf"}} {timer.count}',
+            f'{name}_sum {timer.total}',
+            f'{name}_count {timer.count}',
+        ]
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+
+# ---------------------
+# Value conversion
+# ---------------------
+
+def to_json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def to_csv_value(value):
+    if isinstance(value, list):
+        return ','.join(value)
+    return to_json_value(value)
+
+
+# ---------------------
+# Writers
+# ---------------------
+# Every writer consumes rows one at a time and yields text as it goes, so
+# the memory used does not depend on the number of exported rows.
+
+def csv_lines(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([to_csv_value(x) for x in row])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def ndjson_lines(columns, rows):
+    for row in rows:
+        yield json.dumps(
+            dict(zip(columns, [to_json_value(x) for x in row]))) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': (csv_lines, 'text/csv'),
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+}
+
+
+def write_parquet(path, columns, rows, row_group_size=10000):
+    # Columnar export, one Parquet row group per chunk of rows. Needs the
+    # optional pyarrow package.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from itertools import islice
+
+    rows = iter(rows)
+    writer = None
+    try:
+        while True:
+            chunk = list(islice(rows, row_group_size))
+            if not chunk:
+                break
+
+            table = pa.Table.from_arrays(
+                [pa.array(list(x)) for x in zip(*chunk)], names=columns)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
@@ -6,9 +6,12 @@ from fabric.contrib.console import confirm
 
 def test():
     with settings(warn_only=True):
-        result = local(
-            "python test_tasks.py -v && python test_users.py -v", capture=True
-        )
+        result = local("python -m pytest -q", capture=True)
+        if result.succeeded:
+            result = local(
+                "python benchmarks/run.py --compare benchmarks/baseline.json",
+                capture=True
+            )
     if result.failed and not confirm("Tests failed. Continue?"):
         abort("Aborted at user request.")
 
@@ -38,9 +41,13 @@ def heroku():
     local("git push heroku master")
 
 
+def assets():
+    local("flask build-assets")
+
+
 def heroku_test():
     local(
-        "heroku run python test_tasks.py -v && heroku run python test_users.py -v"
+        "heroku run python benchmarks/run.py"
     )
 
 
@@ -0,0 +1,53 @@
+from datetime import date, datetime
+from functools import lru_cache
+
+import dateutil.parser
+from babel.core import Locale
+from babel.dates import LC_TIME, parse_pattern
+
+DATETIME_FORMATS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma",
+}
+
+
+@lru_cache(maxsize=64)
+def get_datetime_pattern(format, locale):
+    # Compiled Babel pattern and parsed locale for a (format, locale) pair,
+    # resolved once per process instead of on every formatted value.
+    pattern = parse_pattern(DATETIME_FORMATS.get(format, format))
+    return pattern, Locale.parse(locale)
+
+
+def format_datetime(value, format='medium', locale=LC_TIME):
+    # Native datetimes are formatted directly, strings are still accepted
+    # for callers that have not moved off ISO strings. Naive values are
+    # treated as UTC, matching babel.dates.format_datetime.
+    if isinstance(value, str):
+        value = dateutil.parser.parse(value)
+    pattern, locale = get_datetime_pattern(format, locale)
+    return pattern.apply(value, locale)
+
+
+def format_datetimes(values, format='medium', locale=LC_TIME):
+    # Formats a list of datetimes (e.g. every show on a page), resolving the
+    # pattern once and formatting repeated start times only once.
+    pattern, locale = get_datetime_pattern(format, locale)
+    formatted = {}
+    for value in values:
+        if value not in formatted:
+            formatted[value] = pattern.apply(value, locale)
+    return [formatted[value] for value in values]
+
+
+def convert_datetime_to_string(datetime_obj):
+    return datetime.strftime(datetime_obj, '%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def json_default(value):
+    # JSON encoder fallback for view-model values
+    if isinstance(value, datetime):
+        return convert_datetime_to_string(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
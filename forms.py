@@ -1,9 +1,13 @@
 from datetime import datetime
 from flask_wtf import Form
-from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField, TextAreaField
-from wtforms.validators import DataRequired, AnyOf, URL, ValidationError
+from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField, TextAreaField, IntegerField
+from wtforms.validators import DataRequired, AnyOf, URL, ValidationError, NumberRange, Optional
+from wtforms.widgets import HiddenInput
 from enums import State, Genre
 
+# Longest booking a show can make, in minutes
+MAX_SHOW_DURATION_MINUTES = 24 * 60
+
 # ---------------------
 # Custom validators
 # ---------------------
@@ -21,17 +25,22 @@ def genre_validator(form, field):
 # ---------------------
 
 class ShowForm(Form):
-    artist_id = StringField(
-        'artist_id'
+    artist_id = IntegerField(
+        'artist_id', validators=[DataRequired()]
     )
-    venue_id = StringField(
-        'venue_id'
+    venue_id = IntegerField(
+        'venue_id', validators=[DataRequired()]
     )
     start_time = DateTimeField(
         'start_time',
         validators=[DataRequired()],
         default=datetime.today()
     )
+    duration_minutes = IntegerField(
+        'duration_minutes',
+        validators=[DataRequired(), NumberRange(min=1, max=MAX_SHOW_DURATION_MINUTES)],
+        default=120
+    )
 
 
 class VenueForm(Form):
@@ -79,6 +88,11 @@ class VenueForm(Form):
     seeking_description = TextAreaField(
         'seeking_description'
     )
+    # Version of the listing the edit form was loaded from, rendered by
+    # hidden_tag() and checked before the edit is saved
+    version = IntegerField(
+        'version', widget=HiddenInput(), validators=[Optional()]
+    )
 
 
 class ArtistForm(Form):
@@ -124,3 +138,6 @@ class ArtistForm(Form):
     seeking_description = TextAreaField(
         'seeking_description'
     )
+    version = IntegerField(
+        'version', widget=HiddenInput(), validators=[Optional()]
+    )
@@ -0,0 +1,164 @@
+import csv
+import json
+from itertools import islice
+
+from werkzeug.datastructures import MultiDict
+
+# Spellings of false in CSV cells, e.g. the `False` csv.writer writes for
+# the exported boolean columns
+FALSE_STRINGS = {'false', '0', 'no', 'n', 'off'}
+
+
+# ---------------------
+# Readers
+# ---------------------
+
+class InvalidRecord:
+    # Stands in for a line that could not be parsed, import_records
+    # reports it like a row that failed validation.
+    def __init__(self, error):
+        self.error = error
+
+
+def read_records(path):
+    # Yields (line number, record) pairs from a CSV file with a header row
+    # or from a newline delimited JSON file, without reading it all at once.
+    if path.endswith(('.ndjson', '.jsonl')):
+        with open(path) as f:
+            for line_number, line in enumerate(f, start=1):
+                if line.strip():
+                    yield line_number, parse_json_record(line)
+    else:
+        with open(path, newline='') as f:
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+
+
+def parse_json_record(line):
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return InvalidRecord(f'invalid JSON: {e}')
+    if not isinstance(record, dict):
+        return InvalidRecord('expected a JSON object')
+    return record
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def get_field_names(form_class, field_type):
+    # Names of the form's fields of one type, e.g. 'SelectMultipleField'
+    return [
+        name for name, field in form_class(MultiDict(), meta={'csrf': False})._fields.items()
+        if field.type == field_type
+    ]
+
+
+def to_formdata(record, list_fields=(), boolean_fields=()):
+    # Converts a CSV or JSON record to the form data a browser would post.
+    # List fields can be given as JSON arrays or comma separated CSV cells,
+    # unchecked boolean fields as JSON false or any of FALSE_STRINGS.
+    formdata = MultiDict()
+    for key, value in record.items():
+        if value is None or value is False:
+            continue
+        if key in boolean_fields and isinstance(value, str) \
+                and value.strip().lower() in FALSE_STRINGS:
+            continue
+        if key in list_fields and isinstance(value, str):
+            value = [x.strip() for x in value.split(',') if x.strip()]
+        if isinstance(value, list):
+            for item in value:
+                formdata.add(key, item)
+        elif value is True:
+            formdata.add(key, 'y')
+        else:
+            formdata.add(key, str(value))
+    return formdata
+
+
+# ---------------------
+# Import pipeline
+# ---------------------
+
+class ImportReport:
+    def __init__(self):
+        self.imported = 0
+        self.errors = []
+
+    def add_error(self, line_number, error):
+        self.errors.append((line_number, error))
+
+    def __str__(self):
+        lines = [f'Imported {self.imported} rows, {len(self.errors)} errors']
+        lines += [f'  line {line}: {error}' for line, error in self.errors]
+        return '\n'.join(lines)
+
+
+def import_records(records, form_class, columns, insert_rows,
+                   prepare_chunk=None, chunk_size=1000):
+    # Validates records with the same form used by the HTML submission and
+    # hands every chunk of valid rows to insert_rows as a single batch.
+    # Unparseable lines and invalid rows are reported without stopping the
+    # import. When the database refuses a chunk its rows are inserted one
+    # at a time, so only the offending lines are reported and skipped.
+    report = ImportReport()
+    list_fields = get_field_names(form_class, 'SelectMultipleField')
+    boolean_fields = get_field_names(form_class, 'BooleanField')
+
+    for chunk in chunked(records, chunk_size):
+        for line_number, record in chunk:
+            if isinstance(record, InvalidRecord):
+                report.add_error(line_number, record.error)
+        chunk = [x for x in chunk if not isinstance(x[1], InvalidRecord)]
+
+        if prepare_chunk:
+            failed = set()
+            for line_number, error in prepare_chunk(chunk):
+                report.add_error(line_number, error)
+                failed.add(line_number)
+            chunk = [x for x in chunk if x[0] not in failed]
+
+        rows = []
+        for line_number, record in chunk:
+            form = form_class(
+                to_formdata(record, list_fields, boolean_fields),
+                meta={'csrf': False})
+            if form.validate():
+                rows.append((
+                    line_number,
+                    {column: form[column].data for column in columns}
+                ))
+            else:
+                report.add_error(line_number, form.errors)
+
+        if not rows:
+            continue
+
+        try:
+            insert_rows([row for _, row in rows])
+            report.imported += len(rows)
+        except Exception:
+            for line_number, row in rows:
+                try:
+                    insert_rows([row])
+                    report.imported += 1
+                except Exception as e:
+                    report.add_error(line_number, database_error(e))
+
+    return report
+
+
+def database_error(error):
+    # First line of the driver's message, without the statement and its
+    # parameters SQLAlchemy appends
+    message = str(getattr(error, 'orig', None) or error).strip()
+    return message.splitlines()[0] if message else type(error).__name__
@@ -0,0 +1,148 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from flask import g, has_request_context, request
+
+
+# ---------------------
+# Filters and formatters
+# ---------------------
+
+class RequestContextFilter(logging.Filter):
+    # Runs on the request thread, before the record is queued, so the
+    # request id and route are captured while the request is still active.
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            record.route = request.endpoint
+        else:
+            record.request_id = None
+            record.route = None
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    # Lets through at most `limit` identical records (same logger, level and
+    # message) per `window` seconds. The next record let through for that
+    # message carries the number of suppressed repeats.
+    def __init__(self, limit=10, window=60):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window_start, count, suppressed = self._seen.get(key, (now, 0, 0))
+            if now - window_start > self.window:
+                window_start, count = now, 0
+
+            if count >= self.limit:
+                self._seen[key] = (window_start, count, suppressed + 1)
+                return False
+
+            self._seen[key] = (window_start, count + 1, 0)
+            if len(self._seen) > 10000:
+                self._seen.clear()
+
+        record.suppressed = suppressed
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+            'route': getattr(record, 'route', None),
+            'location': f'{record.pathname}:{record.lineno}',
+        }
+        if getattr(record, 'suppressed', 0):
+            data['suppressed_repeats'] = record.suppressed
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    # Never blocks the request thread: when the listener falls behind and
+    # the queue is full, records are dropped and counted instead.
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Merge the arguments and render the traceback on the request
+        # thread, the listener only serializes plain values.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# ---------------------
+# Setup
+# ---------------------
+
+def init_logging(app):
+    # Routes the root logger (and so app.logger and the module level
+    # logging.* calls) through an in-memory queue. A background listener
+    # writes JSON lines to a size-rotated file.
+    log_queue = queue.Queue(maxsize=app.config.get('LOG_QUEUE_SIZE', 10000))
+
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+    queue_handler.addFilter(RateLimitFilter(
+        limit=app.config.get('LOG_RATE_LIMIT', 10),
+        window=app.config.get('LOG_RATE_LIMIT_WINDOW', 60)
+    ))
+
+    file_handler = RotatingFileHandler(
+        app.config.get('LOG_FILE', 'error.log'),
+        maxBytes=app.config.get('LOG_MAX_BYTES', 10 * 1024 * 1024),
+        backupCount=app.config.get('LOG_BACKUP_COUNT', 5)
+    )
+    file_handler.setFormatter(JSONFormatter())
+
+    listener = QueueListener(log_queue, file_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(queue_handler)
+
+    @app.before_request
+    def assign_request_id():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+
+    @app.after_request
+    def return_request_id(response):
+        if g.get('request_id'):
+            response.headers['X-Request-ID'] = g.request_id
+        return response
+
+    return listener
@@ -0,0 +1,181 @@
+import heapq
+import threading
+import time
+from collections import Counter, defaultdict
+
+# Score of a candidate: the share of the subject's genres it plays, plus
+# bonuses for playing in the same city or state and for past shows together
+GENRE_WEIGHT = 1.0
+CITY_WEIGHT = 0.5
+STATE_WEIGHT = 0.25
+HISTORY_WEIGHT = 0.2
+HISTORY_CAP = 5
+
+
+# ---------------------
+# Indexes
+# ---------------------
+
+class Listing:
+    __slots__ = ('id', 'name', 'genres', 'city', 'state', 'seeking')
+
+    def __init__(self, listing_id, name, genres, city, state, seeking):
+        self.id = listing_id
+        self.name = name
+        self.genres = frozenset(genres or ())
+        self.city = city
+        self.state = state
+        self.seeking = bool(seeking)
+
+
+class ListingIndex:
+    # Every live venue (or artist), plus an inverted index of genre -> ids
+    # over the seeking ones, which is where match candidates come from.
+    def __init__(self):
+        self.listings = {}
+        self.by_genre = defaultdict(set)
+        self.watermark = None
+
+    def update(self, listing):
+        self.remove(listing.id)
+        self.listings[listing.id] = listing
+        if listing.seeking:
+            for genre in listing.genres:
+                self.by_genre[genre].add(listing.id)
+
+    def remove(self, listing_id):
+        listing = self.listings.pop(listing_id, None)
+        if listing and listing.seeking:
+            for genre in listing.genres:
+                self.by_genre[genre].discard(listing_id)
+
+    def overlap(self, genres):
+        # candidate id -> number of the given genres it plays
+        counts = Counter()
+        for genre in genres:
+            counts.update(self.by_genre.get(genre, ()))
+        return counts
+
+
+# ---------------------
+# Matchmaker
+# ---------------------
+
+class Matchmaker:
+    # Ranks seeking venues for an artist, and seeking artists for a venue,
+    # from per-worker in-memory indexes so a lookup never touches the
+    # database. load_listings(kind, since) yields (id, name, genres, city,
+    # state, seeking, deleted_at, updated_at) rows changed since a time,
+    # or all of them, and load_history() yields (venue_id, artist_id, count)
+    # for past shows. Listings are refreshed incrementally every
+    # refresh_interval seconds, or after miss_refresh_interval seconds when
+    # a lookup names an unknown id. Everything, including the show history
+    # and hard deleted rows, is rebuilt every rebuild_interval seconds.
+
+    def __init__(self, load_listings, load_history, refresh_interval=30,
+                 rebuild_interval=3600, miss_refresh_interval=1):
+        self.load_listings = load_listings
+        self.load_history = load_history
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self.miss_refresh_interval = miss_refresh_interval
+        self.indexes = None
+        self.history = None
+        self.refreshed_at = 0
+        self.rebuilt_at = 0
+        self._lock = threading.Lock()
+
+    def refresh(self, max_age=None):
+        # Reloads the listings once they are older than max_age seconds,
+        # refresh_interval by default
+        if max_age is None:
+            max_age = self.refresh_interval
+        if time.monotonic() - self.refreshed_at < max_age:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            if now - self.refreshed_at < max_age:
+                # another thread refreshed while this one waited
+                return
+
+            if self.indexes is None or now - self.rebuilt_at >= self.rebuild_interval:
+                self._rebuild()
+                self.rebuilt_at = now
+            else:
+                for kind, index in self.indexes.items():
+                    self._load(kind, index, index.watermark)
+            self.refreshed_at = now
+
+    def _rebuild(self):
+        indexes = {'venues': ListingIndex(), 'artists': ListingIndex()}
+        for kind, index in indexes.items():
+            self._load(kind, index, None)
+
+        history = {'venues': defaultdict(Counter), 'artists': defaultdict(Counter)}
+        for venue_id, artist_id, count in self.load_history():
+            history['venues'][venue_id][artist_id] = count
+            history['artists'][artist_id][venue_id] = count
+
+        # swapped in whole, lookups never see a half built index
+        self.indexes, self.history = indexes, history
+
+    def _load(self, kind, index, since):
+        # rows changed at the watermark itself are read again, updates are
+        # idempotent and no change committed in the same instant is missed
+        for listing_id, name, genres, city, state, seeking, deleted_at, updated_at \
+                in self.load_listings(kind, since):
+            if deleted_at:
+                index.remove(listing_id)
+            else:
+                index.update(Listing(listing_id, name, genres, city, state, seeking))
+            if index.watermark is None or updated_at > index.watermark:
+                index.watermark = updated_at
+
+    def match(self, kind, subject_id, limit=10):
+        # Best seeking matches of the other kind for venue or artist
+        # subject_id, None if there is no such listing.
+        self.refresh()
+        if subject_id not in self.indexes[kind].listings:
+            # created since the last refresh? Lookups of ids that do not
+            # exist must not run a query (under the lock) each.
+            self.refresh(max_age=self.miss_refresh_interval)
+
+        with self._lock:
+            subject = self.indexes[kind].listings.get(subject_id)
+            if subject is None:
+                return None
+            other = 'artists' if kind == 'venues' else 'venues'
+            return self._rank(
+                subject, self.indexes[other],
+                self.history[kind].get(subject_id, {}), limit)
+
+    def _rank(self, subject, candidates, past_shows, limit):
+        scores = {}
+        if subject.genres:
+            for candidate_id, shared in candidates.overlap(subject.genres).items():
+                scores[candidate_id] = GENRE_WEIGHT * shared / len(subject.genres)
+        for candidate_id, count in past_shows.items():
+            listing = candidates.listings.get(candidate_id)
+            if listing and listing.seeking:
+                scores[candidate_id] = scores.get(candidate_id, 0) \
+                    + HISTORY_WEIGHT * min(count, HISTORY_CAP)
+        for candidate_id in scores:
+            listing = candidates.listings[candidate_id]
+            if listing.state == subject.state:
+                scores[candidate_id] += CITY_WEIGHT \
+                    if listing.city == subject.city else STATE_WEIGHT
+
+        matches = []
+        for candidate_id, score in heapq.nlargest(
+                limit, scores.items(), key=lambda x: (x[1], -x[0])):
+            listing = candidates.listings[candidate_id]
+            matches.append({
+                'id': listing.id,
+                'name': listing.name,
+                'score': round(score, 3),
+                'shared_genres': sorted(subject.genres & listing.genres),
+                'same_city': (listing.city, listing.state) == (subject.city, subject.state),
+                'past_shows': past_shows.get(candidate_id, 0)
+            })
+        return matches
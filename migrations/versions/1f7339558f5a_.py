@@ -0,0 +1,40 @@
+"""add indexes for show, venue and artist access paths
+
+Revision ID: 1f7339558f5a
+Revises: 5e64cc3a5358
+Create Date: 2026-10-17 09:12:41.204317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1f7339558f5a'
+down_revision = '5e64cc3a5358'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_Show_venue_id_start_time', 'Show',
+                    ['venue_id', 'start_time'], unique=False)
+    op.create_index('ix_Show_artist_id_start_time', 'Show',
+                    ['artist_id', 'start_time'], unique=False)
+    op.create_index('ix_Show_start_time_id', 'Show',
+                    ['start_time', 'id'], unique=False)
+    op.create_index('ix_Venue_city_state', 'Venue',
+                    ['city', 'state'], unique=False)
+    op.create_index('ix_Venue_genres', 'Venue', ['genres'],
+                    unique=False, postgresql_using='gin')
+    op.create_index('ix_Artist_genres', 'Artist', ['genres'],
+                    unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_Artist_genres', table_name='Artist')
+    op.drop_index('ix_Venue_genres', table_name='Venue')
+    op.drop_index('ix_Venue_city_state', table_name='Venue')
+    op.drop_index('ix_Show_start_time_id', table_name='Show')
+    op.drop_index('ix_Show_artist_id_start_time', table_name='Show')
+    op.drop_index('ix_Show_venue_id_start_time', table_name='Show')
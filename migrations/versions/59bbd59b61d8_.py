@@ -0,0 +1,35 @@
+"""add soft delete to venue and artist with partial indexes over live rows
+
+Revision ID: 59bbd59b61d8
+Revises: 7af12f3befc9
+Create Date: 2026-10-17 17:20:44.518302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '59bbd59b61d8'
+down_revision = '7af12f3befc9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('Venue', 'Artist'):
+        op.add_column(table, sa.Column('deleted_at', sa.DateTime(), nullable=True))
+
+    op.create_index('ix_Venue_active_city_state_name', 'Venue',
+                    ['city', 'state', 'name'], unique=False,
+                    postgresql_where=sa.text('deleted_at IS NULL'))
+    op.create_index('ix_Artist_active_id_name', 'Artist',
+                    ['id', 'name'], unique=False,
+                    postgresql_where=sa.text('deleted_at IS NULL'))
+
+
+def downgrade():
+    op.drop_index('ix_Artist_active_id_name', table_name='Artist')
+    op.drop_index('ix_Venue_active_city_state_name', table_name='Venue')
+    for table in ('Venue', 'Artist'):
+        op.drop_column(table, 'deleted_at')
@@ -0,0 +1,36 @@
+"""add trigram indexes for venue and artist search
+
+Revision ID: 66e713aaf031
+Revises: 1f7339558f5a
+Create Date: 2026-10-17 10:03:17.581923
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '66e713aaf031'
+down_revision = '1f7339558f5a'
+branch_labels = None
+depends_on = None
+
+SEARCH_INDEXES = [
+    ('ix_Venue_name_trgm', 'Venue', 'name'),
+    ('ix_Venue_city_trgm', 'Venue', 'city'),
+    ('ix_Artist_name_trgm', 'Artist', 'name'),
+    ('ix_Artist_city_trgm', 'Artist', 'city'),
+]
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in SEARCH_INDEXES:
+        op.create_index(name, table, [column], unique=False,
+                        postgresql_using='gin',
+                        postgresql_ops={column: 'gin_trgm_ops'})
+
+
+def downgrade():
+    for name, table, column in reversed(SEARCH_INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,152 @@
+"""maintain show counters from per-statement deltas
+
+Revision ID: 67870f3b67a9
+Revises: 59bbd59b61d8
+Create Date: 2026-10-18 10:04:12.381906
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '67870f3b67a9'
+down_revision = '59bbd59b61d8'
+branch_labels = None
+depends_on = None
+
+COUNTER_TABLES = [('Venue', 'venue_id'), ('Artist', 'artist_id')]
+
+# (owner id, start_time, +1 or -1) for every show a statement adds to or
+# removes from an owner, read from the statement's transition tables. An
+# update that moves a show counts as removing the old and adding the new.
+CHANGES = {
+    'INSERT': """
+        SELECT {column} AS id, start_time, 1 AS sign FROM new_shows
+    """,
+    'UPDATE': """
+        SELECT n.{column} AS id, n.start_time, 1 AS sign
+        FROM new_shows AS n JOIN old_shows AS o ON o.id = n.id
+        WHERE (n.start_time, n.{column}) IS DISTINCT FROM (o.start_time, o.{column})
+        UNION ALL
+        SELECT o.{column}, o.start_time, -1
+        FROM new_shows AS n JOIN old_shows AS o ON o.id = n.id
+        WHERE (n.start_time, n.{column}) IS DISTINCT FROM (o.start_time, o.{column})
+    """,
+    'DELETE': """
+        SELECT {column} AS id, start_time, -1 AS sign FROM old_shows
+    """,
+}
+
+
+def apply_deltas(table, column, changes):
+    # Adds the net change of every affected owner to its counters, so a
+    # statement touching N shows costs one grouped pass over them rather
+    # than N full recounts. next_show_time only needs the (<fk>,
+    # start_time) index when the current next show is removed. Owners
+    # whose next show has already passed are waiting for roll-over-shows,
+    # their upcoming count may still include started shows, so they are
+    # recomputed instead.
+    changes = changes.format(column=column)
+    return f"""
+        WITH changes AS ({changes}),
+        deltas AS (
+            SELECT
+                id,
+                sum(sign) AS total,
+                coalesce(sum(sign) FILTER (WHERE start_time > now_utc), 0) AS upcoming,
+                min(start_time) FILTER (
+                    WHERE sign > 0 AND start_time > now_utc
+                ) AS added_next,
+                array_agg(start_time) FILTER (WHERE sign < 0) AS removed
+            FROM changes
+            GROUP BY id
+        )
+        UPDATE "{table}" AS t SET
+            total_shows_count = t.total_shows_count + d.total,
+            upcoming_shows_count = t.upcoming_shows_count + d.upcoming,
+            past_shows_count = t.past_shows_count + d.total - d.upcoming,
+            next_show_time = CASE
+                WHEN t.next_show_time = ANY(d.removed) THEN (
+                    SELECT min(start_time) FROM "Show"
+                    WHERE {column} = t.id AND start_time > now_utc
+                )
+                ELSE LEAST(t.next_show_time, d.added_next)
+            END
+        FROM deltas AS d
+        WHERE t.id = d.id
+            AND (t.next_show_time IS NULL OR t.next_show_time > now_utc);
+
+        PERFORM refresh_{table.lower()}_show_counters(id)
+        FROM "{table}"
+        WHERE id IN (SELECT id FROM ({changes}) AS changes)
+            AND next_show_time <= now_utc;
+    """
+
+
+def upgrade():
+    branches = []
+    for operation, changes in CHANGES.items():
+        statements = ''.join(
+            apply_deltas(table, column, changes)
+            for table, column in COUNTER_TABLES
+        )
+        branches.append(f"TG_OP = '{operation}' THEN {statements}")
+
+    op.execute('DROP TRIGGER show_counters ON "Show"')
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION show_counters_trigger() RETURNS trigger AS $$
+        DECLARE
+            now_utc timestamp := now() AT TIME ZONE 'utc';
+        BEGIN
+            IF {' ELSIF '.join(branches)}
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    # Transition tables need one trigger per event
+    op.execute("""
+        CREATE TRIGGER show_counters_insert
+        AFTER INSERT ON "Show"
+        REFERENCING NEW TABLE AS new_shows
+        FOR EACH STATEMENT EXECUTE PROCEDURE show_counters_trigger();
+    """)
+    op.execute("""
+        CREATE TRIGGER show_counters_update
+        AFTER UPDATE ON "Show"
+        REFERENCING OLD TABLE AS old_shows NEW TABLE AS new_shows
+        FOR EACH STATEMENT EXECUTE PROCEDURE show_counters_trigger();
+    """)
+    op.execute("""
+        CREATE TRIGGER show_counters_delete
+        AFTER DELETE ON "Show"
+        REFERENCING OLD TABLE AS old_shows
+        FOR EACH STATEMENT EXECUTE PROCEDURE show_counters_trigger();
+    """)
+
+
+def downgrade():
+    for operation in ('delete', 'update', 'insert'):
+        op.execute(f'DROP TRIGGER show_counters_{operation} ON "Show"')
+    op.execute("""
+        CREATE OR REPLACE FUNCTION show_counters_trigger() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM refresh_venue_show_counters(NEW.venue_id);
+                PERFORM refresh_artist_show_counters(NEW.artist_id);
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM refresh_venue_show_counters(OLD.venue_id);
+                PERFORM refresh_artist_show_counters(OLD.artist_id);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER show_counters
+        AFTER INSERT OR UPDATE OF start_time, venue_id, artist_id OR DELETE
+        ON "Show"
+        FOR EACH ROW EXECUTE PROCEDURE show_counters_trigger();
+    """)
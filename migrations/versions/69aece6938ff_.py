@@ -0,0 +1,48 @@
+"""add show duration and reject overlapping venue or artist bookings
+
+Revision ID: 69aece6938ff
+Revises: c6882b11f3ef
+Create Date: 2026-10-17 15:52:11.870243
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '69aece6938ff'
+down_revision = 'c6882b11f3ef'
+branch_labels = None
+depends_on = None
+
+# start_time is a naive UTC timestamp, so the booked period is a tsrange
+SHOW_PERIOD = "tsrange(start_time, start_time + duration_minutes * interval '1 minute')"
+
+
+def upgrade():
+    op.add_column('Show', sa.Column('duration_minutes', sa.Integer(),
+                                    server_default='120', nullable=False))
+    op.create_check_constraint(
+        'ck_Show_duration_minutes_positive', 'Show', 'duration_minutes > 0')
+
+    # Fails if existing shows already overlap, list them with:
+    #   SELECT a.id, b.id FROM "Show" a JOIN "Show" b ON a.id < b.id
+    #   AND (a.venue_id = b.venue_id OR a.artist_id = b.artist_id)
+    #   AND tsrange(a.start_time, a.start_time + a.duration_minutes * interval '1 minute')
+    #    && tsrange(b.start_time, b.start_time + b.duration_minutes * interval '1 minute');
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    op.execute(f"""
+        ALTER TABLE "Show" ADD CONSTRAINT "ex_Show_venue_period"
+        EXCLUDE USING gist (venue_id WITH =, ({SHOW_PERIOD}) WITH &&)
+    """)
+    op.execute(f"""
+        ALTER TABLE "Show" ADD CONSTRAINT "ex_Show_artist_period"
+        EXCLUDE USING gist (artist_id WITH =, ({SHOW_PERIOD}) WITH &&)
+    """)
+
+
+def downgrade():
+    op.drop_constraint('ex_Show_artist_period', 'Show')
+    op.drop_constraint('ex_Show_venue_period', 'Show')
+    op.drop_constraint('ck_Show_duration_minutes_positive', 'Show')
+    op.drop_column('Show', 'duration_minutes')
@@ -0,0 +1,27 @@
+"""add version columns to venue and artist for optimistic concurrency
+
+Revision ID: 7af12f3befc9
+Revises: 69aece6938ff
+Create Date: 2026-10-17 16:41:27.305118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7af12f3befc9'
+down_revision = '69aece6938ff'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('Venue', 'Artist'):
+        op.add_column(table, sa.Column(
+            'version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    for table in ('Venue', 'Artist'):
+        op.drop_column(table, 'version')
@@ -0,0 +1,33 @@
+"""add updated_at to venue, artist and show for incremental exports
+
+Revision ID: 7b815be0b8e3
+Revises: 90a491ce3504
+Create Date: 2026-10-17 12:48:05.662180
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b815be0b8e3'
+down_revision = '90a491ce3504'
+branch_labels = None
+depends_on = None
+
+TABLES = ['Venue', 'Artist', 'Show']
+
+
+def upgrade():
+    for table in TABLES:
+        op.add_column(table, sa.Column(
+            'updated_at', sa.DateTime(), nullable=False,
+            server_default=sa.text("(now() AT TIME ZONE 'utc')")))
+        op.create_index(f'ix_{table}_updated_at', table,
+                        ['updated_at'], unique=False)
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        op.drop_index(f'ix_{table}_updated_at', table_name=table)
+        op.drop_column(table, 'updated_at')
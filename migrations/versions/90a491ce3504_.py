@@ -0,0 +1,93 @@
+"""add denormalized show counters to venue and artist
+
+Revision ID: 90a491ce3504
+Revises: 66e713aaf031
+Create Date: 2026-10-17 11:26:52.093114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '90a491ce3504'
+down_revision = '66e713aaf031'
+branch_labels = None
+depends_on = None
+
+COUNTER_TABLES = [('Venue', 'venue_id'), ('Artist', 'artist_id')]
+
+
+def upgrade():
+    for table, show_column in COUNTER_TABLES:
+        op.add_column(table, sa.Column('total_shows_count', sa.Integer(),
+                                       server_default='0', nullable=False))
+        op.add_column(table, sa.Column('upcoming_shows_count', sa.Integer(),
+                                       server_default='0', nullable=False))
+        op.add_column(table, sa.Column('past_shows_count', sa.Integer(),
+                                       server_default='0', nullable=False))
+        op.add_column(table, sa.Column('next_show_time', sa.DateTime(),
+                                       nullable=True))
+        op.create_index(f'ix_{table}_next_show_time', table,
+                        ['next_show_time'], unique=False)
+
+        # Recomputes the counters of one row from the (<fk>, start_time)
+        # index. Shows are stored as naive UTC timestamps.
+        op.execute(f"""
+            CREATE FUNCTION refresh_{table.lower()}_show_counters(target_id integer)
+            RETURNS void AS $$
+                UPDATE "{table}" SET
+                    total_shows_count = counters.total,
+                    upcoming_shows_count = counters.upcoming,
+                    past_shows_count = counters.total - counters.upcoming,
+                    next_show_time = counters.next_show_time
+                FROM (
+                    SELECT
+                        count(*) AS total,
+                        count(*) FILTER (
+                            WHERE start_time > (now() AT TIME ZONE 'utc')
+                        ) AS upcoming,
+                        min(start_time) FILTER (
+                            WHERE start_time > (now() AT TIME ZONE 'utc')
+                        ) AS next_show_time
+                    FROM "Show"
+                    WHERE {show_column} = target_id
+                ) AS counters
+                WHERE id = target_id;
+            $$ LANGUAGE sql;
+        """)
+        op.execute(f'SELECT refresh_{table.lower()}_show_counters(id) FROM "{table}"')
+
+    op.execute("""
+        CREATE FUNCTION show_counters_trigger() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM refresh_venue_show_counters(NEW.venue_id);
+                PERFORM refresh_artist_show_counters(NEW.artist_id);
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM refresh_venue_show_counters(OLD.venue_id);
+                PERFORM refresh_artist_show_counters(OLD.artist_id);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER show_counters
+        AFTER INSERT OR UPDATE OF start_time, venue_id, artist_id OR DELETE
+        ON "Show"
+        FOR EACH ROW EXECUTE PROCEDURE show_counters_trigger();
+    """)
+
+
+def downgrade():
+    op.execute('DROP TRIGGER show_counters ON "Show"')
+    op.execute('DROP FUNCTION show_counters_trigger()')
+    for table, show_column in reversed(COUNTER_TABLES):
+        op.execute(f'DROP FUNCTION refresh_{table.lower()}_show_counters(integer)')
+        op.drop_index(f'ix_{table}_next_show_time', table_name=table)
+        op.drop_column(table, 'next_show_time')
+        op.drop_column(table, 'past_shows_count')
+        op.drop_column(table, 'upcoming_shows_count')
+        op.drop_column(table, 'total_shows_count')
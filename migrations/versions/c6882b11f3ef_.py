@@ -0,0 +1,66 @@
+"""add per-day show counts for the calendar
+
+Revision ID: c6882b11f3ef
+Revises: 7b815be0b8e3
+Create Date: 2026-10-17 14:37:29.318750
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6882b11f3ef'
+down_revision = '7b815be0b8e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ShowDayCount',
+                    sa.Column('day', sa.Date(), nullable=False),
+                    sa.Column('venue_id', sa.Integer(), nullable=False),
+                    sa.Column('count', sa.Integer(), nullable=False),
+                    sa.ForeignKeyConstraint(['venue_id'], ['Venue.id'],
+                                            ondelete='CASCADE'),
+                    sa.PrimaryKeyConstraint('day', 'venue_id')
+                    )
+    op.execute("""
+        INSERT INTO "ShowDayCount" (day, venue_id, count)
+        SELECT start_time::date, venue_id, count(*)
+        FROM "Show"
+        GROUP BY start_time::date, venue_id
+    """)
+
+    op.execute("""
+        CREATE FUNCTION show_day_counts_trigger() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO "ShowDayCount" (day, venue_id, count)
+                VALUES (NEW.start_time::date, NEW.venue_id, 1)
+                ON CONFLICT (day, venue_id)
+                DO UPDATE SET count = "ShowDayCount".count + 1;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE "ShowDayCount" SET count = count - 1
+                WHERE day = OLD.start_time::date AND venue_id = OLD.venue_id;
+                DELETE FROM "ShowDayCount"
+                WHERE day = OLD.start_time::date AND venue_id = OLD.venue_id
+                    AND count <= 0;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER show_day_counts
+        AFTER INSERT OR UPDATE OF start_time, venue_id OR DELETE
+        ON "Show"
+        FOR EACH ROW EXECUTE PROCEDURE show_day_counts_trigger();
+    """)
+
+
+def downgrade():
+    op.execute('DROP TRIGGER show_day_counts ON "Show"')
+    op.execute('DROP FUNCTION show_day_counts_trigger()')
+    op.drop_table('ShowDayCount')
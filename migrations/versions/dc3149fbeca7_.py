@@ -0,0 +1,137 @@
+"""maintain show day counts from per-statement deltas
+
+Revision ID: dc3149fbeca7
+Revises: 67870f3b67a9
+Create Date: 2026-10-18 15:21:47.602318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'dc3149fbeca7'
+down_revision = '67870f3b67a9'
+branch_labels = None
+depends_on = None
+
+# (day, venue_id, +1 or -1) for every show a statement adds to or removes
+# from a day of a venue, read from the statement's transition tables. An
+# update that moves a show counts as removing the old and adding the new.
+CHANGES = {
+    'INSERT': """
+        SELECT start_time::date AS day, venue_id, 1 AS sign FROM new_shows
+    """,
+    'UPDATE': """
+        SELECT n.start_time::date AS day, n.venue_id, 1 AS sign
+        FROM new_shows AS n JOIN old_shows AS o ON o.id = n.id
+        WHERE (n.start_time::date, n.venue_id)
+            IS DISTINCT FROM (o.start_time::date, o.venue_id)
+        UNION ALL
+        SELECT o.start_time::date, o.venue_id, -1
+        FROM new_shows AS n JOIN old_shows AS o ON o.id = n.id
+        WHERE (n.start_time::date, n.venue_id)
+            IS DISTINCT FROM (o.start_time::date, o.venue_id)
+    """,
+    'DELETE': """
+        SELECT start_time::date AS day, venue_id, -1 AS sign FROM old_shows
+    """,
+}
+
+
+def apply_deltas(changes):
+    # Adds the net change of every affected (day, venue) in one statement
+    # per direction, in key order so concurrent statements lock the rows in
+    # the same order. Decrements delete the rows they bring to zero and
+    # update the rest, so they only touch existing rows: when a venue is
+    # deleted its day counts may already be gone with it.
+    deltas = f"""
+        SELECT day, venue_id, sum(sign) AS delta
+        FROM ({changes}) AS changes
+        GROUP BY day, venue_id
+    """
+    return f"""
+        INSERT INTO "ShowDayCount" (day, venue_id, count)
+        SELECT day, venue_id, delta FROM ({deltas}) AS d
+        WHERE delta > 0
+        ORDER BY day, venue_id
+        ON CONFLICT (day, venue_id)
+        DO UPDATE SET count = "ShowDayCount".count + EXCLUDED.count;
+
+        DELETE FROM "ShowDayCount" AS c
+        USING ({deltas}) AS d
+        WHERE d.delta < 0 AND c.day = d.day AND c.venue_id = d.venue_id
+            AND c.count + d.delta <= 0;
+
+        UPDATE "ShowDayCount" AS c SET count = c.count + d.delta
+        FROM ({deltas}) AS d
+        WHERE d.delta < 0 AND c.day = d.day AND c.venue_id = d.venue_id;
+    """
+
+
+def upgrade():
+    branches = [
+        f"TG_OP = '{operation}' THEN {apply_deltas(changes)}"
+        for operation, changes in CHANGES.items()
+    ]
+
+    op.execute('DROP TRIGGER show_day_counts ON "Show"')
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION show_day_counts_trigger() RETURNS trigger AS $$
+        BEGIN
+            IF {' ELSIF '.join(branches)}
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    # Transition tables need one trigger per event
+    op.execute("""
+        CREATE TRIGGER show_day_counts_insert
+        AFTER INSERT ON "Show"
+        REFERENCING NEW TABLE AS new_shows
+        FOR EACH STATEMENT EXECUTE PROCEDURE show_day_counts_trigger();
+    """)
+    op.execute("""
+        CREATE TRIGGER show_day_counts_update
+        AFTER UPDATE ON "Show"
+        REFERENCING OLD TABLE AS old_shows NEW TABLE AS new_shows
+        FOR EACH STATEMENT EXECUTE PROCEDURE show_day_counts_trigger();
+    """)
+    op.execute("""
+        CREATE TRIGGER show_day_counts_delete
+        AFTER DELETE ON "Show"
+        REFERENCING OLD TABLE AS old_shows
+        FOR EACH STATEMENT EXECUTE PROCEDURE show_day_counts_trigger();
+    """)
+
+
+def downgrade():
+    for operation in ('delete', 'update', 'insert'):
+        op.execute(f'DROP TRIGGER show_day_counts_{operation} ON "Show"')
+    op.execute("""
+        CREATE OR REPLACE FUNCTION show_day_counts_trigger() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO "ShowDayCount" (day, venue_id, count)
+                VALUES (NEW.start_time::date, NEW.venue_id, 1)
+                ON CONFLICT (day, venue_id)
+                DO UPDATE SET count = "ShowDayCount".count + 1;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE "ShowDayCount" SET count = count - 1
+                WHERE day = OLD.start_time::date AND venue_id = OLD.venue_id;
+                DELETE FROM "ShowDayCount"
+                WHERE day = OLD.start_time::date AND venue_id = OLD.venue_id
+                    AND count <= 0;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+    op.execute("""
+        CREATE TRIGGER show_day_counts
+        AFTER INSERT OR UPDATE OF start_time, venue_id OR DELETE
+        ON "Show"
+        FOR EACH ROW EXECUTE PROCEDURE show_day_counts_trigger();
+    """)
@@ -0,0 +1,109 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('fyyur.queries')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class RequestQueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def repeated(self, threshold):
+        return [
+            {'statement': statement, 'count': count}
+            for statement, count in self.fingerprints.most_common()
+            if count >= threshold
+        ]
+
+
+def fingerprint(statement):
+    # Statements are already parameterized, only whitespace and expanded
+    # IN lists differ between executions of the same query.
+    statement = re.sub(r'\s+', ' ', statement).strip()
+    return re.sub(r'IN \((?:[^()]|\([^()]*\))*\)', 'IN (...)', statement)
+
+
+class QueryProfiler:
+    # Opt-in (QUERY_PROFILER) per-request SQL instrumentation. Adds a
+    # Server-Timing header and a structured log line to every response and
+    # flags statements repeated QUERY_PROFILER_REPEAT_THRESHOLD times or more,
+    # the usual sign of an N+1. With QUERY_BUDGET set and QUERY_PROFILER_STRICT
+    # enabled, the statement that goes over budget raises QueryBudgetExceeded.
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        if not app.config.get('QUERY_PROFILER'):
+            return
+
+        event.listen(Engine, 'before_cursor_execute', self.before_execute)
+        event.listen(Engine, 'after_cursor_execute', self.after_execute)
+        app.before_request(self.start_request)
+        app.after_request(self.finish_request)
+
+    def start_request(self):
+        g.query_stats = RequestQueryStats()
+
+    def before_execute(self, conn, cursor, statement, parameters, context,
+                       executemany):
+        stats = has_request_context() and g.get('query_stats')
+        if not stats:
+            return
+
+        stats.count += 1
+        stats.fingerprints[fingerprint(statement)] += 1
+
+        budget = self.app.config.get('QUERY_BUDGET')
+        if (budget and self.app.config.get('QUERY_PROFILER_STRICT')
+                and stats.count > budget):
+            raise QueryBudgetExceeded(
+                f'{request.endpoint} issued more than {budget} queries, '
+                f'repeated: {stats.repeated(2)}'
+            )
+
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def after_execute(self, conn, cursor, statement, parameters, context,
+                      executemany):
+        stats = has_request_context() and g.get('query_stats')
+        if stats and conn.info.get('query_start'):
+            stats.duration += time.perf_counter() - conn.info['query_start'].pop()
+
+    def finish_request(self, response):
+        stats = g.get('query_stats')
+        if not stats:
+            return response
+
+        db_ms = stats.duration * 1000
+        response.headers.add(
+            'Server-Timing', f'db;dur={db_ms:.1f};desc="{stats.count} queries"')
+
+        repeated = stats.repeated(
+            self.app.config.get('QUERY_PROFILER_REPEAT_THRESHOLD', 5))
+        logger.log(logging.WARNING if repeated else logging.INFO, json.dumps({
+            'route': request.endpoint,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': stats.count,
+            'db_ms': round(db_ms, 1),
+            'repeated': repeated,
+        }))
+
+        return response
@@ -0,0 +1,91 @@
+import random
+import time
+from functools import wraps
+
+from flask import g, has_request_context, session
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import event, orm
+
+from cache import BaseCache
+
+# Flask session key holding the time until which the client reads from the
+# primary, so a user sees their own writes despite replication lag.
+PRIMARY_UNTIL_KEY = 'read_primary_until'
+# Page cache key holding the time of the last eviction, so every worker
+# sharing the cache sees it
+LAST_EVICTION_KEY = 'replica:last_eviction'
+
+
+class RoutingSession(SignallingSession):
+    # Sends the queries of views marked with read_only to one of the
+    # replica binds, the same one for the whole request so a page is built
+    # from a single snapshot. Flushes, and every other view, use the
+    # primary.
+
+    def __init__(self, db, **options):
+        self._db = db
+        super().__init__(db, **options)
+
+    def get_bind(self, mapper=None, clause=None):
+        replicas = self.app.config.get('SQLALCHEMY_REPLICA_BINDS')
+        if replicas and not self._flushing and g_uses_replica():
+            if 'replica' not in g:
+                g.replica = random.choice(replicas)
+            return self._db.get_engine(self.app, bind=g.replica)
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def stick_to_primary(db_session):
+    if has_request_context():
+        window = db_session.app.config.get('READ_YOUR_WRITES_SECONDS', 0)
+        session[PRIMARY_UNTIL_KEY] = time.time() + window
+
+
+def g_uses_replica():
+    return has_request_context() and g.get('use_replica', False)
+
+
+def read_only(view):
+    # Marks a view as safe to serve from a replica, unless the client wrote
+    # something recently.
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.use_replica = session.get(PRIMARY_UNTIL_KEY, 0) < time.time()
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaSafeCache(BaseCache):
+    # Wraps the page cache so a view served from a replica does not store
+    # what it built within `window` seconds of the last eviction. The
+    # replica may not have replayed the write yet, and the stale entry
+    # would otherwise be served for the whole TTL, even to the writer who
+    # reads from the primary.
+
+    def __init__(self, cache, window):
+        self.cache = cache
+        self.window = window
+        self.evicted_at = 0
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value):
+        if g_uses_replica() and self.last_eviction() > time.time() - self.window:
+            return
+        self.cache.set(key, value)
+
+    def delete(self, *keys):
+        self.evicted_at = time.time()
+        self.cache.set(LAST_EVICTION_KEY, self.evicted_at)
+        self.cache.delete(*keys)
+
+    def last_eviction(self):
+        return max(self.evicted_at, self.cache.get(LAST_EVICTION_KEY) or 0)
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+from enums import State, Genre
+
+# ---------------------
+# Synthetic catalog generator
+# ---------------------
+# Rows are produced as dicts ready for a multi-row INSERT, so large
+# datasets can be written in chunks without building ORM objects.
+
+CITIES_PER_STATE = 3
+WORDS = [
+    'Blue', 'Velvet', 'Electric', 'Golden', 'Hidden', 'Midnight', 'Neon',
+    'Silver', 'Wild', 'Crimson', 'Echo', 'Lucky', 'Rusty', 'Sonic', 'Urban',
+]
+VENUE_KINDS = ['Hall', 'Lounge', 'Club', 'Theatre', 'Room', 'Garden', 'Bar']
+ARTIST_KINDS = ['Band', 'Quartet', 'Collective', 'Trio', 'Project', 'Orchestra']
+
+
+def random_name(rng, kinds):
+    return f'The {rng.choice(WORDS)} {rng.choice(WORDS)} {rng.choice(kinds)}'
+
+
+def random_location(rng):
+    state = rng.choice(list(State)).value
+    return f'{state} City {rng.randint(1, CITIES_PER_STATE)}', state
+
+
+def random_genres(rng):
+    return rng.sample([x.value for x in Genre], rng.randint(1, 3))
+
+
+def generate_venues(count, rng):
+    for i in range(count):
+        city, state = random_location(rng)
+        yield {
+            'name': random_name(rng, VENUE_KINDS),
+            'city': city,
+            'state': state,
+            'address': f'{rng.randint(1, 9999)} Main Street',
+            'phone': f'{rng.randint(200, 999)}-555-{rng.randint(1000, 9999)}',
+            'genres': random_genres(rng),
+            'image_link': f'https://images.example.com/venues/{i}.jpg',
+            'facebook_link': f'https://www.facebook.com/venue{i}',
+            'website': f'https://venue{i}.example.com',
+            'seeking_talent': rng.random() < 0.3,
+            'seeking_description': 'Looking for local acts',
+        }
+
+
+def generate_artists(count, rng):
+    for i in range(count):
+        city, state = random_location(rng)
+        yield {
+            'name': random_name(rng, ARTIST_KINDS),
+            'city': city,
+            'state': state,
+            'phone': f'{rng.randint(200, 999)}-555-{rng.randint(1000, 9999)}',
+            'genres': random_genres(rng),
+            'image_link': f'https://images.example.com/artists/{i}.jpg',
+            'facebook_link': f'https://www.facebook.com/artist{i}',
+            'website': f'https://artist{i}.example.com',
+            'seeking_venue': rng.random() < 0.3,
+            'seeking_description': 'Looking for venues to play',
+        }
+
+
+def generate_shows(count, venue_ids, artist_ids, rng, past_ratio=0.5,
+                   spread_days=365, duration_minutes=120):
+    # Shows are spread over spread_days on either side of now, with
+    # past_ratio of them in the past, at evening times on the hour. A venue
+    # or artist plays at most once per day so no two shows overlap (see the
+    # Show exclusion constraints); draws that would double-book are retried
+    # and eventually skipped, so fewer than count shows may be produced.
+    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    booked_venues, booked_artists = set(), set()
+    for _ in range(count):
+        for _ in range(10):
+            days = rng.randint(1, spread_days)
+            if rng.random() < past_ratio:
+                days = -days
+            venue_id = rng.choice(venue_ids)
+            artist_id = rng.choice(artist_ids)
+            if ((venue_id, days) not in booked_venues
+                    and (artist_id, days) not in booked_artists):
+                break
+        else:
+            continue
+
+        booked_venues.add((venue_id, days))
+        booked_artists.add((artist_id, days))
+        yield {
+            'venue_id': venue_id,
+            'artist_id': artist_id,
+            'start_time': now + timedelta(days=days, hours=rng.randint(0, 6)),
+            'duration_minutes': duration_minutes,
+        }
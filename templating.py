@@ -0,0 +1,70 @@
+import logging
+import os
+
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+
+from cache import LRUCache, NullCache
+
+
+# ---------------------
+# Fragment cache
+# ---------------------
+
+class FragmentCacheExtension(Extension):
+    # {% cache 'venue-header', venue.id, venue.version %}...{% endcache %}
+    # renders the block once per key. Keys name everything the fragment
+    # shows (ids plus versions or timestamps), so entries never need to be
+    # evicted, a changed listing simply renders under a new key.
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=NullCache())
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key.append(parser.parse_expression())
+
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_render_fragment', [nodes.List(key)]),
+            [], [], body
+        ).set_lineno(lineno)
+
+    def _render_fragment(self, key, caller):
+        key = 'fragment:' + ':'.join(str(x) for x in key)
+        return self.environment.fragment_cache.get_or_set(key, caller)
+
+
+# ---------------------
+# Setup
+# ---------------------
+
+def init_templates(app):
+    # Adds the fragment cache and, with JINJA_BYTECODE_CACHE_DIR set, keeps
+    # compiled templates on disk. TEMPLATE_PRECOMPILE then loads every
+    # template at startup, so a fresh worker reads bytecode written by an
+    # earlier one instead of parsing, and serves its first requests from
+    # templates it already holds.
+    env = app.jinja_env
+    env.add_extension(FragmentCacheExtension)
+    if app.config.get('CACHE_BACKEND') != 'null':
+        env.fragment_cache = LRUCache(
+            max_entries=app.config.get('FRAGMENT_CACHE_MAX_ENTRIES', 10000),
+            ttl=app.config.get('FRAGMENT_CACHE_TTL', 24 * 60 * 60)
+        )
+
+    directory = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+    if app.config.get('TEMPLATE_PRECOMPILE'):
+        names = env.list_templates(extensions=['html'])
+        for name in names:
+            env.get_template(name)
+        logging.getLogger('fyyur.templates').info(
+            f'Precompiled {len(names)} templates')
@@ -0,0 +1,89 @@
+import os
+import sys
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# The tests run against a real PostgreSQL database, migrated to the latest
+# revision and emptied before every test, so never point this at data you
+# want to keep:
+#
+#   $ createdb fyyur_test
+#   $ TEST_DATABASE_URL=postgresql://fyyur@localhost:5432/fyyur_test python -m pytest
+#
+# Without TEST_DATABASE_URL the database tests are skipped.
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+
+# Read before the app is imported: every request hits the database
+if TEST_DATABASE_URL:
+    os.environ['DATABASE_URL'] = TEST_DATABASE_URL
+os.environ['CACHE_BACKEND'] = 'null'
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope='session')
+def app():
+    if not TEST_DATABASE_URL:
+        pytest.skip('TEST_DATABASE_URL is not set')
+
+    from flask_migrate import upgrade
+    from app import app
+
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    with app.app_context():
+        upgrade(directory=os.path.join(ROOT, 'migrations'))
+    return app
+
+
+@pytest.fixture
+def db(app):
+    from app import db
+
+    with app.app_context():
+        db.session.execute(
+            'TRUNCATE "Show", "ShowDayCount", "Venue", "Artist" '
+            'RESTART IDENTITY CASCADE')
+        db.session.commit()
+        yield db
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app, db):
+    return app.test_client()
+
+
+@pytest.fixture
+def seed(app, db):
+    # Adds a synthetic catalog through `flask seed`, call again to grow it
+    runner = app.test_cli_runner()
+
+    def seed(venues, artists, shows, random_seed=0):
+        result = runner.invoke(args=[
+            'seed', '--venues', str(venues), '--artists', str(artists),
+            '--shows', str(shows), '--random-seed', str(random_seed)
+        ])
+        assert result.exit_code == 0, result.output
+
+    return seed
+
+
+@contextmanager
+def count_queries():
+    # Collects every (statement, parameters) sent to the database inside
+    # the block
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context,
+                       executemany):
+        statements.append((statement, parameters))
+
+    event.listen(Engine, 'before_cursor_execute', before_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, 'before_cursor_execute', before_execute)
@@ -0,0 +1,104 @@
+import gzip
+import hashlib
+import json
+
+import pytest
+from flask import Flask, url_for
+
+import assets
+from assets import IMMUTABLE, Assets, build_assets
+
+CSS = b'body { color: #333; }\n' * 200
+ENCODINGS = (['br'] if assets.brotli else []) + ['gzip']
+
+
+@pytest.fixture
+def static(tmp_path):
+    folder = tmp_path / 'static'
+    (folder / 'css').mkdir(parents=True)
+    (folder / 'js').mkdir()
+    (folder / 'img').mkdir()
+    (folder / 'css' / 'main.css').write_bytes(CSS)
+    # too small to shrink when compressed
+    (folder / 'js' / 'tiny.js').write_bytes(b'x')
+    (folder / 'img' / 'logo.png').write_bytes(b'\x89PNG' + b'\0' * 500)
+    return folder
+
+
+def version(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def test_build_writes_the_manifest_and_smaller_variants(static):
+    build = static / 'build'
+    manifest = build_assets(str(static), str(build))
+
+    assert manifest == {
+        'css/main.css': {'version': version(CSS), 'encodings': ENCODINGS},
+        'js/tiny.js': {'version': version(b'x'), 'encodings': []},
+        'img/logo.png': {'version': version(b'\x89PNG' + b'\0' * 500), 'encodings': []},
+    }
+    assert json.loads((build / 'manifest.json').read_text()) == manifest
+    assert gzip.decompress((build / 'css' / 'main.css.gz').read_bytes()) == CSS
+    assert not (build / 'js' / 'tiny.js.gz').exists()
+    assert not (build / 'img' / 'logo.png.gz').exists()
+
+
+def test_build_skips_files_with_an_unchanged_hash(static, monkeypatch):
+    build = str(static / 'build')
+    build_assets(str(static), build)
+
+    compressed = []
+    real_compress = assets.compress
+
+    def compress(path, target):
+        compressed.append(path)
+        return real_compress(path, target)
+
+    monkeypatch.setattr(assets, 'compress', compress)
+    build_assets(str(static), build)
+    assert compressed == []
+
+    (static / 'css' / 'main.css').write_bytes(CSS + b'a { color: red; }\n')
+    manifest = build_assets(str(static), build)
+    assert compressed == [str(static / 'css' / 'main.css')]
+    assert manifest['css/main.css']['version'] == version(CSS + b'a { color: red; }\n')
+
+
+@pytest.fixture
+def assets_app(static):
+    build_assets(str(static), str(static / 'build'))
+    app = Flask(__name__, static_folder=str(static))
+    Assets(app)
+    return app
+
+
+def test_send_serves_fingerprinted_urls_precompressed_and_immutable(assets_app):
+    with assets_app.test_request_context():
+        url = url_for('assets', filename='css/main.css')
+    assert url == f'/static/v/{version(CSS)}/css/main.css'
+
+    response = assets_app.test_client().get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Content-Type'].startswith('text/css')
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.headers['Cache-Control'] == IMMUTABLE
+    assert gzip.decompress(response.get_data()) == CSS
+    response.close()
+
+    response = assets_app.test_client().get(url)
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['Cache-Control'] == IMMUTABLE
+    assert response.get_data() == CSS
+    response.close()
+
+
+def test_send_uses_default_caching_for_other_versions(assets_app):
+    client = assets_app.test_client()
+    for url in ('/static/v/0123456789ab/css/main.css', '/static/v/dev/css/main.css'):
+        response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+        assert response.status_code == 200
+        assert 'Content-Encoding' not in response.headers
+        assert response.headers.get('Cache-Control') != IMMUTABLE
+        assert response.get_data() == CSS
+        response.close()
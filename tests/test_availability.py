@@ -0,0 +1,48 @@
+import pytest
+
+
+def slot(**changes):
+    return dict({
+        'venue_id': 1, 'artist_id': 1,
+        'start_time': '2030-01-01T20:00:00', 'duration_minutes': 90
+    }, **changes)
+
+
+def test_availability_reports_conflicts(client, db, seed):
+    seed(venues=1, artists=2, shows=0)
+    assert client.post('/shows/create', data={
+        'venue_id': 1, 'artist_id': 1, 'start_time': '2030-01-01 19:00:00',
+        'duration_minutes': 120
+    }).status_code == 200
+
+    response = client.post('/api/v1/availability', json={'slots': [
+        slot(artist_id=2),
+        slot(artist_id=2, start_time='2030-01-02T20:00:00'),
+    ]})
+    assert response.status_code == 200
+    assert [x['available'] for x in response.get_json()['slots']] == [False, True]
+
+
+@pytest.mark.parametrize('duration', [0, -30, 24 * 60 + 1, 'long'])
+def test_availability_rejects_invalid_durations(client, db, duration):
+    response = client.post(
+        '/api/v1/availability', json={'slots': [slot(duration_minutes=duration)]})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('start_time, available', [
+    ('2030-01-01T20:00:00Z', False),
+    ('2030-01-01T21:00:00+01:00', False),
+    ('2030-01-01T20:00:00-05:00', True),
+])
+def test_availability_converts_offsets_to_utc(client, db, seed, start_time, available):
+    seed(venues=1, artists=1, shows=0)
+    assert client.post('/shows/create', data={
+        'venue_id': 1, 'artist_id': 1, 'start_time': '2030-01-01 19:00:00',
+        'duration_minutes': 120
+    }).status_code == 200
+
+    response = client.post(
+        '/api/v1/availability', json={'slots': [slot(start_time=start_time)]})
+    assert response.status_code == 200
+    assert response.get_json()['slots'][0]['available'] is available
@@ -0,0 +1,28 @@
+import html
+import re
+
+
+def test_browse_filtered_by_genre(client, db, seed):
+    seed(venues=30, artists=30, shows=0)
+
+    for kind in ('venues', 'artists'):
+        facets = client.get(
+            f'/api/v1/{kind}/facets', query_string={'genre': 'Jazz'}).get_json()
+        expected = db.session.execute(
+            f'SELECT count(*) FROM "{kind[:-1].title()}" '
+            f'WHERE \'Jazz\' = ANY(genres)').scalar()
+        assert facets['total'] == expected
+
+        assert client.get(f'/{kind}?genre=Jazz').status_code == 200
+        assert client.get(f'/{kind}?genre=Jazz&genre=Blues').status_code == 200
+        assert client.get(f'/api/v1/{kind}?genre=Jazz').status_code == 200
+
+
+def test_facet_links_resolve(client, seed):
+    seed(venues=30, artists=30, shows=0)
+
+    page = client.get('/venues').get_data(as_text=True)
+    links = set(re.findall(r'href="(/venues\?[^"]+)"', page))
+    assert any('genre=' in x for x in links)
+    for link in links:
+        assert client.get(html.unescape(link)).status_code == 200
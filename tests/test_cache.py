@@ -0,0 +1,106 @@
+import pickle
+from datetime import datetime
+
+import pytest
+
+import cache
+from cache import LRUCache, NullCache, RedisCache, create_cache
+
+
+class FakeRedis:
+    # The redis-py methods RedisCache uses, over a dict
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        assert isinstance(value, bytes)
+        self.data[key] = value
+        self.expiry[key] = ex
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_lru_entries_expire_after_ttl(clock):
+    lru = LRUCache(ttl=10)
+    lru.set('a', 1)
+
+    clock[0] += 9.9
+    assert lru.get('a') == 1
+    clock[0] += 0.2
+    assert lru.get('a') is None
+
+
+def test_lru_drops_the_least_recently_used_entry():
+    lru = LRUCache(max_entries=2)
+    lru.set('a', 1)
+    lru.set('b', 2)
+    assert lru.get('a') == 1
+
+    lru.set('c', 3)
+    assert (lru.get('a'), lru.get('b'), lru.get('c')) == (1, None, 3)
+
+
+@pytest.mark.parametrize('backend', [
+    lambda: LRUCache(), lambda: RedisCache(FakeRedis())])
+def test_get_or_set_does_not_cache_none(backend):
+    store = backend()
+    builds = []
+
+    def build(value):
+        def builder():
+            builds.append(value)
+            return value
+        return builder
+
+    assert store.get_or_set('missing', build(None)) is None
+    assert store.get_or_set('missing', build('inserted')) == 'inserted'
+    assert store.get_or_set('missing', build('rebuilt')) == 'inserted'
+    assert builds == [None, 'inserted']
+
+
+@pytest.mark.parametrize('backend', [
+    lambda: LRUCache(), lambda: RedisCache(FakeRedis())])
+def test_delete_removes_every_given_key(backend):
+    store = backend()
+    for key in ('a', 'b', 'c'):
+        store.set(key, key)
+
+    store.delete('a', 'c', 'unknown')
+    store.delete()
+    assert [store.get(x) for x in ('a', 'b', 'c')] == [None, 'b', None]
+
+
+def test_redis_prefixes_and_pickles_values():
+    client = FakeRedis()
+    store = RedisCache(client, ttl=30, prefix='test:')
+    value = {'start_time': datetime(2030, 1, 1, 20), 'genres': ['Jazz']}
+
+    store.set('show:1', value)
+    assert list(client.data) == ['test:show:1']
+    assert client.expiry['test:show:1'] == 30
+    assert pickle.loads(client.data['test:show:1']) == value
+    assert store.get('show:1') == value
+    assert store.get('show:2') is None
+
+    store.delete('show:1')
+    assert client.data == {}
+
+
+def test_create_cache_backends():
+    assert isinstance(create_cache({}), LRUCache)
+    assert isinstance(create_cache({'CACHE_BACKEND': 'null'}), NullCache)
+    with pytest.raises(ValueError):
+        create_cache({'CACHE_BACKEND': 'memcached'})
@@ -0,0 +1,82 @@
+from sqlalchemy import event
+
+
+def venue_form(**changes):
+    return dict({
+        'name': 'Edited Hall', 'city': 'Austin', 'state': 'TX',
+        'address': '1 Main Street', 'genres': ['Jazz'],
+        'facebook_link': 'https://www.facebook.com/edited',
+        'website': 'https://edited.example.com',
+    }, **changes)
+
+
+def current_version(db, table, listing_id):
+    return db.session.execute(
+        f'SELECT version FROM "{table}" WHERE id = :id', {'id': listing_id}).scalar()
+
+
+def test_edit_with_a_stale_version_is_refused(client, db, seed):
+    seed(venues=1, artists=1, shows=0)
+    version = current_version(db, 'Venue', 1)
+
+    response = client.post('/venues/1/edit', data=venue_form(version=version - 1))
+    assert response.status_code == 409
+    assert b'was changed by someone else' in response.data
+
+    response = client.post('/venues/1/edit', data=venue_form(version=version))
+    assert response.status_code == 302
+    assert current_version(db, 'Venue', 1) == version + 1
+
+
+def test_edit_racing_another_commit_is_refused(app, client, db, seed):
+    from app import db as app_db
+    from routing import RoutingSession
+
+    seed(venues=1, artists=1, shows=0)
+    version = current_version(db, 'Venue', 1)
+
+    def concurrent_edit(session, flush_context, instances):
+        # another editor commits between the version check and the flush
+        app_db.engine.execute(
+            'UPDATE "Venue" SET version = version + 1 WHERE id = 1')
+
+    event.listen(RoutingSession, 'before_flush', concurrent_edit, once=True)
+    try:
+        response = client.post('/venues/1/edit', data=venue_form(version=version))
+    finally:
+        event.remove(RoutingSession, 'before_flush', concurrent_edit)
+
+    assert response.status_code == 409
+    db.session.expire_all()
+    assert db.session.execute('SELECT name FROM "Venue" WHERE id = 1').scalar() \
+        != 'Edited Hall'
+
+
+def test_batch_reports_stale_versions_as_conflicts(client, db, seed):
+    seed(venues=2, artists=1, shows=0)
+    version = current_version(db, 'Venue', 1)
+
+    response = client.post('/api/v1/venues/batch', json={'items': [
+        {'id': 1, 'version': version - 1, 'name': 'Stale'},
+        {'id': 2, 'version': current_version(db, 'Venue', 2), 'name': 'Fresh'},
+    ]})
+
+    results = response.get_json()['results']
+    assert [x['status'] for x in results] == ['conflict', 'updated']
+    names = dict(db.session.execute('SELECT id, name FROM "Venue"').fetchall())
+    assert names[1] != 'Stale' and names[2] == 'Fresh'
+
+
+def test_batch_updates_array_and_boolean_columns(client, db, seed):
+    seed(venues=2, artists=1, shows=0)
+
+    response = client.post('/api/v1/venues/batch', json={'items': [
+        {'id': 1, 'genres': ['Jazz', 'Folk'], 'seeking_talent': True},
+        {'id': 2, 'genres': ['Rock n Roll'], 'seeking_talent': False},
+    ]})
+
+    assert [x['status'] for x in response.get_json()['results']] == \
+        ['updated', 'updated']
+    assert db.session.execute(
+        'SELECT id, genres, seeking_talent FROM "Venue" ORDER BY id'
+    ).fetchall() == [(1, ['Jazz', 'Folk'], True), (2, ['Rock n Roll'], False)]
@@ -0,0 +1,51 @@
+import json
+
+
+def test_import_reports_bad_lines_and_keeps_valid_rows(app, db, seed, tmp_path):
+    from app import Show
+
+    seed(venues=1, artists=2, shows=0)
+    path = tmp_path / 'shows.ndjson'
+    path.write_text('\n'.join([
+        json.dumps({'venue_id': 1, 'artist_id': 1, 'start_time': '2030-01-01 20:00:00'}),
+        '{"venue_id": 1, "artist_id": ',
+        # the venue is already booked by the first show
+        json.dumps({'venue_id': 1, 'artist_id': 2, 'start_time': '2030-01-01 21:00:00'}),
+        json.dumps({'venue_id': 1, 'artist_id': 2, 'start_time': '2030-01-02 20:00:00'}),
+        '[]',
+    ]) + '\n')
+
+    result = app.test_cli_runner().invoke(
+        args=['import-data', 'shows', str(path)])
+
+    assert result.exit_code == 0, result.output
+    assert 'Imported 2 rows, 3 errors' in result.output
+    assert 'line 2: invalid JSON' in result.output
+    assert 'line 3: conflicting key value violates exclusion constraint' in result.output
+    assert 'line 5: expected a JSON object' in result.output
+    assert db.session.query(Show).count() == 2
+
+
+def test_csv_export_round_trips_booleans(app, db, tmp_path):
+    from app import Artist
+
+    runner = app.test_cli_runner()
+    for name, seeking in (('Seeking Band', True), ('Booked Band', False)):
+        db.session.add(Artist(
+            name=name, city='Austin', state='TX', genres=['Jazz'],
+            facebook_link='https://www.facebook.com/band',
+            website='https://band.example.com', seeking_venue=seeking))
+    db.session.commit()
+
+    path = tmp_path / 'artists.csv'
+    result = runner.invoke(args=['export-data', 'artists', str(path)])
+    assert result.exit_code == 0, result.output
+    assert ',False,' in path.read_text()
+
+    db.session.execute('TRUNCATE "Artist" RESTART IDENTITY CASCADE')
+    db.session.commit()
+    result = runner.invoke(args=['import-data', 'artists', str(path)])
+
+    assert 'Imported 2 rows, 0 errors' in result.output
+    assert dict(db.session.query(Artist.name, Artist.seeking_venue)) == {
+        'Seeking Band': True, 'Booked Band': False}
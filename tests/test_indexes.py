@@ -0,0 +1,39 @@
+from conftest import count_queries
+
+
+def explain(db, statement, parameters):
+    connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute('EXPLAIN ' + statement, parameters)
+        return '\n'.join(x[0] for x in cursor.fetchall())
+    finally:
+        connection.close()
+
+
+HOT_PATHS = [
+    '/venues/{venue.id}',
+    '/artists/{venue.id}',
+    '/shows',
+    '/shows?venue_id={venue.id}',
+    '/shows?artist_id={venue.id}',
+    '/shows?city={venue.city}&state={venue.state}',
+]
+
+
+def test_hot_queries_use_indexes(client, db, seed):
+    # large enough for the planner to prefer an index wherever one fits
+    seed(venues=2000, artists=2000, shows=20000)
+    db.session.execute('ANALYZE')
+    db.session.commit()
+    venue = db.session.execute(
+        'SELECT id, city, state FROM "Venue" ORDER BY id LIMIT 1').first()
+
+    for path in HOT_PATHS:
+        with count_queries() as statements:
+            assert client.get(path.format(venue=venue)).status_code == 200
+
+        assert statements
+        for statement, parameters in statements:
+            plan = explain(db, statement, parameters)
+            assert 'Seq Scan' not in plan, f'{path}\n{statement}\n{plan}'
@@ -0,0 +1,60 @@
+import json
+import logging
+import queue
+import sys
+
+import pytest
+
+import logs
+from logs import DroppingQueueHandler, JSONFormatter, RateLimitFilter
+
+
+def record(msg, level=logging.ERROR, name='fyyur', args=None, exc_info=None):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, exc_info)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(logs.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_rate_limit_suppresses_repeats_within_the_window(clock):
+    limit = RateLimitFilter(limit=2, window=60)
+
+    assert [limit.filter(record('db down')) for _ in range(5)] == \
+        [True, True, False, False, False]
+    # other messages, levels and loggers are counted separately
+    assert limit.filter(record('db down', level=logging.WARNING))
+    assert limit.filter(record('db down', name='fyyur.queries'))
+    assert limit.filter(record('cache down'))
+
+    clock[0] += 61
+    allowed = record('db down')
+    assert limit.filter(allowed)
+    assert allowed.suppressed == 3
+    assert json.loads(JSONFormatter().format(allowed))['suppressed_repeats'] == 3
+
+
+def test_full_queue_drops_records_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+
+    for i in range(5):
+        handler.handle(record('request %s failed', args=(i,)))
+
+    assert handler.dropped == 3
+    assert handler.queue.qsize() == 2
+    assert handler.queue.get_nowait().msg == 'request 0 failed'
+
+
+def test_records_are_rendered_before_they_are_queued():
+    handler = DroppingQueueHandler(queue.Queue())
+    try:
+        raise ValueError('bad slot')
+    except ValueError:
+        handler.handle(record('slot %s', args=(3,), exc_info=sys.exc_info()))
+
+    queued = handler.queue.get_nowait()
+    assert (queued.msg, queued.args, queued.exc_info) == ('slot 3', None, None)
+    assert 'ValueError: bad slot' in queued.exc_text
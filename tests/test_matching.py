@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+
+import matching
+from matching import Matchmaker
+
+T0 = datetime(2030, 1, 1)
+
+
+class Catalog:
+    # Stands in for the database behind load_listings and load_history
+    def __init__(self):
+        self.rows = {'venues': {}, 'artists': {}}
+        self.history = []
+        self.loads = []
+
+    def add(self, kind, listing_id, genres, city='Austin', state='TX',
+            seeking=True, minutes=0):
+        self.rows[kind][listing_id] = [
+            listing_id, f'{kind} {listing_id}', genres, city, state, seeking,
+            None, T0 + timedelta(minutes=minutes)]
+
+    def delete(self, kind, listing_id, minutes):
+        row = self.rows[kind][listing_id]
+        row[6] = row[7] = T0 + timedelta(minutes=minutes)
+
+    def load_listings(self, kind, since):
+        self.loads.append((kind, since))
+        return [
+            tuple(x) for x in self.rows[kind].values()
+            if since is None or x[7] >= since
+        ]
+
+    def load_history(self):
+        return self.history
+
+
+def matchmaker(catalog, **options):
+    return Matchmaker(catalog.load_listings, catalog.load_history, **options)
+
+
+def ids(matches):
+    return [x['id'] for x in matches]
+
+
+def test_ranking():
+    catalog = Catalog()
+    catalog.add('artists', 1, ['Jazz', 'Blues'])
+    catalog.add('venues', 1, ['Jazz', 'Blues'])
+    catalog.add('venues', 2, ['Jazz'], city='Dallas')
+    catalog.add('venues', 3, ['Jazz', 'Blues'], seeking=False)
+    catalog.add('venues', 4, ['Rock'], city='Albany', state='NY')
+    catalog.add('venues', 5, ['Rock'])
+    catalog.history = [(4, 1, 3)]
+
+    matches = matchmaker(catalog).match('artists', 1)
+
+    # genres 1.0 + same city 0.5, half the genres 0.5 + same state 0.25,
+    # three past shows 0.6. Not seeking or nothing in common: no match.
+    assert [(x['id'], x['score']) for x in matches] == [(1, 1.5), (2, 0.75), (4, 0.6)]
+    assert matches[0]['shared_genres'] == ['Blues', 'Jazz']
+    assert matches[0]['same_city'] and not matches[1]['same_city']
+    assert matches[2]['past_shows'] == 3
+    assert ids(matchmaker(catalog).match('artists', 1, limit=1)) == [1]
+
+
+def test_refresh_loads_changes_since_the_watermark():
+    catalog = Catalog()
+    catalog.add('artists', 1, ['Jazz'])
+    catalog.add('venues', 1, ['Jazz'], minutes=5)
+    matches = matchmaker(catalog, refresh_interval=0)
+
+    assert ids(matches.match('artists', 1)) == [1]
+    assert catalog.loads == [('venues', None), ('artists', None)]
+
+    catalog.add('venues', 2, ['Jazz'], minutes=10)
+    catalog.loads.clear()
+    assert ids(matches.match('artists', 1)) == [1, 2]
+    assert catalog.loads == [
+        ('venues', T0 + timedelta(minutes=5)), ('artists', T0)]
+
+
+def test_soft_deleted_listings_leave_the_index():
+    catalog = Catalog()
+    catalog.add('artists', 1, ['Jazz'])
+    catalog.add('venues', 1, ['Jazz'])
+    catalog.add('venues', 2, ['Jazz'])
+    matches = matchmaker(catalog, refresh_interval=0)
+    assert ids(matches.match('artists', 1)) == [1, 2]
+
+    catalog.delete('venues', 1, minutes=1)
+    catalog.delete('artists', 1, minutes=1)
+    assert matches.match('venues', 2) == []
+    assert matches.match('artists', 1) is None
+
+
+def test_unknown_ids_refresh_at_most_once_per_interval(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(matching.time, 'monotonic', lambda: now[0])
+    catalog = Catalog()
+    catalog.add('artists', 1, ['Jazz'])
+    matches = matchmaker(catalog, refresh_interval=30, miss_refresh_interval=1)
+
+    assert matches.match('artists', 1) == []
+    for _ in range(100):
+        assert matches.match('artists', 404) is None
+    assert len(catalog.loads) == 2
+
+    # an artist created since is found once the interval has passed
+    catalog.add('artists', 2, ['Jazz'], minutes=1)
+    now[0] += 1
+    assert matches.match('artists', 2) == []
+    assert len(catalog.loads) == 4
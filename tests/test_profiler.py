@@ -0,0 +1,81 @@
+import logging
+
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+from profiler import QueryBudgetExceeded, QueryProfiler
+
+
+@pytest.fixture
+def make_app():
+    # Apps whose /venues route runs one query per venue, against SQLite.
+    # The profiler listens on every engine, it is removed again afterwards.
+    profilers = []
+
+    def make_app(**config):
+        app = Flask(__name__)
+        app.config.update(TESTING=True, QUERY_PROFILER=True, **config)
+        engine = create_engine('sqlite://')
+
+        @app.route('/venues/<int:count>')
+        def venues(count):
+            with engine.connect() as connection:
+                for venue_id in range(count):
+                    connection.execute('SELECT ?', venue_id)
+            return 'ok'
+
+        profilers.append(QueryProfiler(app))
+        return app
+
+    yield make_app
+
+    for profiler in profilers:
+        event.remove(Engine, 'before_cursor_execute', profiler.before_execute)
+        event.remove(Engine, 'after_cursor_execute', profiler.after_execute)
+
+
+@pytest.fixture
+def query_log(caplog, monkeypatch):
+    # Alembic's fileConfig disables the loggers that exist when the test
+    # database is migrated, this one included
+    logger = logging.getLogger('fyyur.queries')
+    monkeypatch.setattr(logger, 'disabled', False)
+    monkeypatch.setattr(logger, 'level', logging.INFO)
+    return caplog
+
+
+def test_server_timing_reports_the_query_count(make_app, query_log):
+    client = make_app().test_client()
+    response = client.get('/venues/3')
+
+    assert response.status_code == 200
+    assert response.headers['Server-Timing'].startswith('db;dur=')
+    assert response.headers['Server-Timing'].endswith(';desc="3 queries"')
+    assert '"queries": 3' in query_log.records[-1].getMessage()
+    assert query_log.records[-1].levelno == logging.INFO
+
+
+def test_repeated_statements_are_logged_as_warnings(make_app, query_log):
+    client = make_app(QUERY_PROFILER_REPEAT_THRESHOLD=5).test_client()
+    client.get('/venues/6')
+
+    assert query_log.records[-1].levelno == logging.WARNING
+    assert '"count": 6' in query_log.records[-1].getMessage()
+
+
+def test_strict_mode_fails_requests_over_budget(make_app):
+    client = make_app(QUERY_BUDGET=3, QUERY_PROFILER_STRICT=True).test_client()
+
+    assert client.get('/venues/3').status_code == 200
+    with pytest.raises(QueryBudgetExceeded, match='venues issued more than 3 queries'):
+        client.get('/venues/4')
+
+
+def test_budget_is_only_enforced_in_strict_mode(make_app):
+    client = make_app(QUERY_BUDGET=3).test_client()
+
+    response = client.get('/venues/4')
+    assert response.status_code == 200
+    assert 'desc="4 queries"' in response.headers['Server-Timing']
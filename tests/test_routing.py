@@ -0,0 +1,99 @@
+import sqlite3
+
+from flask import Flask, g
+
+from cache import LRUCache
+from routing import ReplicaSafeCache
+
+
+def test_replica_reads_do_not_refill_evicted_keys():
+    app = Flask(__name__)
+    shared = LRUCache()
+    writer = ReplicaSafeCache(shared, window=5)
+    reader = ReplicaSafeCache(shared, window=5)
+
+    writer.delete('venue:1')
+    with app.test_request_context():
+        g.use_replica = True
+        # built from a replica that may not have the write yet
+        assert reader.get_or_set('venue:1', lambda: 'stale') == 'stale'
+        assert shared.get('venue:1') is None
+
+        g.use_replica = False
+        assert reader.get_or_set('venue:1', lambda: 'fresh') == 'fresh'
+        assert shared.get('venue:1') == 'fresh'
+
+
+def test_replica_reads_are_cached_outside_the_window():
+    app = Flask(__name__)
+    cache = ReplicaSafeCache(LRUCache(), window=0)
+
+    cache.delete('venue:1')
+    with app.test_request_context():
+        g.use_replica = True
+        assert cache.get_or_set('venue:1', lambda: 'page') == 'page'
+        assert cache.get('venue:1') == 'page'
+
+
+def routed_app(tmp_path, replicas):
+    # Primary and replica SQLite databases that each answer with their
+    # own name
+    from routing import RoutingSQLAlchemy, read_only
+
+    names = ['primary'] + replicas
+    for name in names:
+        connection = sqlite3.connect(str(tmp_path / f'{name}.db'))
+        connection.execute('CREATE TABLE whoami (name TEXT)')
+        connection.execute('INSERT INTO whoami VALUES (?)', (name,))
+        connection.commit()
+        connection.close()
+
+    app = Flask(__name__)
+    app.config.update(
+        SECRET_KEY='test',
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path}/primary.db',
+        SQLALCHEMY_BINDS={x: f'sqlite:///{tmp_path}/{x}.db' for x in replicas},
+        SQLALCHEMY_REPLICA_BINDS=replicas,
+        READ_YOUR_WRITES_SECONDS=60,
+    )
+    db = RoutingSQLAlchemy(app)
+
+    def whoami():
+        return db.session.execute('SELECT name FROM whoami').scalar()
+
+    @app.route('/read')
+    @read_only
+    def read():
+        return ','.join(whoami() for _ in range(20))
+
+    @app.route('/write', methods=['POST'])
+    def write():
+        name = whoami()
+        db.session.commit()
+        return name
+
+    return app
+
+
+def test_reads_go_to_the_replica_and_writes_to_the_primary(tmp_path):
+    app = routed_app(tmp_path, ['replica'])
+    client = app.test_client()
+
+    assert set(client.get('/read').data.decode().split(',')) == {'replica'}
+    assert client.post('/write').data == b'primary'
+    # the writer keeps reading from the primary for a while
+    assert set(client.get('/read').data.decode().split(',')) == {'primary'}
+    # other clients do not
+    assert set(app.test_client().get('/read').data.decode().split(',')) == {'replica'}
+
+
+def test_a_request_reads_from_a_single_replica(tmp_path):
+    client = routed_app(tmp_path, ['replica_a', 'replica_b']).test_client()
+
+    seen = set()
+    for _ in range(10):
+        names = set(client.get('/read').data.decode().split(','))
+        assert len(names) == 1
+        seen |= names
+    assert seen <= {'replica_a', 'replica_b'}
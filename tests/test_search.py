@@ -0,0 +1,51 @@
+import pytest
+
+
+@pytest.fixture
+def listings(db):
+    from app import Artist, Venue
+
+    db.session.add_all([
+        Venue(name='The Musical Hop', city='San Francisco', state='CA',
+              genres=['Jazz', 'Reggae', 'Swing', 'Classical', 'Folk']),
+        Venue(name='Park Square Live Music & Coffee', city='San Francisco',
+              state='CA', genres=['Rock n Roll', 'Jazz', 'Classical', 'Folk']),
+        Venue(name='The Dueling Pianos Bar', city='New York', state='NY',
+              genres=['Classical', 'R&B', 'Hip-Hop']),
+        Artist(name='Guns N Petals', city='San Francisco', state='CA',
+               genres=['Rock n Roll']),
+        Artist(name='The Wild Sax Band', city='San Francisco', state='CA',
+               genres=['Jazz', 'Hip-Hop']),
+    ])
+    db.session.commit()
+
+
+@pytest.mark.parametrize('search_term, names', [
+    # name, and the Hip-Hop genre
+    ('Hop', ['The Dueling Pianos Bar', 'The Musical Hop']),
+    ('hop', ['The Dueling Pianos Bar', 'The Musical Hop']),
+    ('Music', ['Park Square Live Music & Coffee', 'The Musical Hop']),
+    ('new york', ['The Dueling Pianos Bar']),
+])
+def test_search_venues(client, listings, search_term, names):
+    response = client.get(
+        '/api/v1/venues/search', query_string={'search_term': search_term})
+    assert response.status_code == 200
+    assert sorted(x['name'] for x in response.get_json()['data']) == names
+
+    response = client.post(
+        '/venues/search', data={'search_term': search_term})
+    assert response.status_code == 200
+    for name in names:
+        assert name.replace('&', '&amp;').encode() in response.data
+
+
+def test_search_artists_by_genre(client, listings):
+    response = client.get(
+        '/api/v1/artists/search', query_string={'search_term': 'Hop'})
+    assert response.status_code == 200
+    assert [x['name'] for x in response.get_json()['data']] == ['The Wild Sax Band']
+
+    response = client.post('/artists/search', data={'search_term': 'Hop'})
+    assert response.status_code == 200
+    assert b'The Wild Sax Band' in response.data
@@ -0,0 +1,100 @@
+import time
+from datetime import datetime, timedelta
+
+COUNTERS = (
+    'SELECT id, total_shows_count, upcoming_shows_count, past_shows_count, '
+    'next_show_time FROM "{table}" ORDER BY id'
+)
+
+
+def counters(db):
+    return {
+        table: db.session.execute(COUNTERS.format(table=table)).fetchall()
+        for table in ('Venue', 'Artist')
+    }
+
+
+def recounted(db):
+    db.session.execute('SELECT refresh_venue_show_counters(id) FROM "Venue"')
+    db.session.execute('SELECT refresh_artist_show_counters(id) FROM "Artist"')
+    return counters(db)
+
+
+def test_counters_follow_bulk_writes(db, seed):
+    # the seeded shows are written in multi-row inserts
+    seed(venues=5, artists=10, shows=200)
+    assert counters(db) == recounted(db)
+
+    # move shows later, some to a new venue, delete some (including the
+    # next shows) and cascade a venue delete
+    db.session.execute('INSERT INTO "Venue" (name) VALUES (\'New Venue\')')
+    db.session.execute("""
+        UPDATE "Show" SET
+            start_time = start_time + interval '3 minutes',
+            venue_id = CASE WHEN venue_id = 2 THEN 6 ELSE venue_id END
+        WHERE id % 2 = 0
+    """)
+    assert counters(db) == recounted(db)
+
+    db.session.execute("""
+        DELETE FROM "Show" WHERE start_time IN (
+            SELECT next_show_time FROM "Artist"
+        ) OR id % 7 = 0
+    """)
+    assert counters(db) == recounted(db)
+
+    db.session.execute('DELETE FROM "Venue" WHERE id = 1')
+    assert counters(db) == recounted(db)
+
+
+def test_counters_of_owners_waiting_for_roll_over(db, seed):
+    seed(venues=1, artists=1, shows=0)
+    now = datetime.utcnow()
+    db.session.execute(
+        'INSERT INTO "Show" (start_time, venue_id, artist_id) VALUES '
+        '(:soon, 1, 1), (:later, 1, 1)',
+        {'soon': now + timedelta(seconds=1), 'later': now + timedelta(days=1)})
+    db.session.commit()
+
+    # the first show starts before roll-over-shows has run, the counters
+    # still list it as upcoming when the next show is booked
+    time.sleep(1.5)
+    db.session.execute(
+        'INSERT INTO "Show" (start_time, venue_id, artist_id) '
+        'VALUES (:time, 1, 1)', {'time': now + timedelta(days=2)})
+    assert counters(db) == recounted(db)
+
+
+DAY_COUNTS = 'SELECT day, venue_id, count FROM "ShowDayCount" ORDER BY day, venue_id'
+RECOUNTED_DAY_COUNTS = (
+    'SELECT start_time::date, venue_id, count(*) FROM "Show" '
+    'GROUP BY 1, 2 ORDER BY 1, 2'
+)
+
+
+def test_day_counts_follow_bulk_writes(db, seed):
+    def day_counts():
+        return db.session.execute(DAY_COUNTS).fetchall()
+
+    def recounted_days():
+        return db.session.execute(RECOUNTED_DAY_COUNTS).fetchall()
+
+    seed(venues=5, artists=10, shows=200)
+    assert day_counts() == recounted_days()
+
+    # move shows to other days and venues, delete some and cascade a
+    # venue delete
+    db.session.execute('INSERT INTO "Venue" (name) VALUES (\'New Venue\')')
+    db.session.execute("""
+        UPDATE "Show" SET
+            start_time = start_time + interval '1 day 3 minutes',
+            venue_id = CASE WHEN venue_id = 2 THEN 6 ELSE venue_id END
+        WHERE id % 3 = 0
+    """)
+    assert day_counts() == recounted_days()
+
+    db.session.execute('DELETE FROM "Show" WHERE id % 7 = 0')
+    assert day_counts() == recounted_days()
+
+    db.session.execute('DELETE FROM "Venue" WHERE id = 1')
+    assert day_counts() == recounted_days()
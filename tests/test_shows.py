@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+
+def jazz_artist_ids(db):
+    return {x[0] for x in db.session.execute(
+        'SELECT id FROM "Artist" WHERE \'Jazz\' = ANY(genres)')}
+
+
+def test_shows_filtered_by_genre(client, db, seed):
+    seed(venues=5, artists=20, shows=200)
+
+    response = client.get('/api/v1/shows', query_string={'genre': 'Jazz'})
+    assert response.status_code == 200
+    shows = response.get_json()['shows']
+    assert shows
+    assert {x['artist_id'] for x in shows} <= jazz_artist_ids(db)
+
+    assert client.get('/shows?genre=Jazz').status_code == 200
+
+
+def test_calendar_filtered_by_genre(client, db, seed):
+    seed(venues=20, artists=20, shows=1000, random_seed=1)
+    first = db.session.execute('SELECT min(start_time) FROM "Show"').scalar()
+    window = {'from': first.date().isoformat(), 'genre': 'Jazz'}
+    window['to'] = (first + timedelta(days=60)).date().isoformat()
+
+    days = client.get('/api/v1/calendar', query_string=window).get_json()['days']
+    shows = [x for day in days for x in day['shows']]
+    assert shows
+    assert {x['artist_id'] for x in shows} <= jazz_artist_ids(db)
+
+    counts = client.get('/api/v1/calendar/counts', query_string=window).get_json()
+    assert sum(x['count'] for x in counts['days']) == len(shows)
+
+    assert client.get('/calendar', query_string=window).status_code == 200
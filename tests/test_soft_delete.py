@@ -0,0 +1,84 @@
+import json
+from datetime import timedelta
+
+import pytest
+
+
+def test_soft_deleted_counterparts_are_neither_listed_nor_counted(client, db, seed):
+    seed(venues=1, artists=5, shows=40)
+    artist_id = db.session.execute(
+        'SELECT artist_id FROM "Show" GROUP BY artist_id '
+        'ORDER BY count(*) DESC LIMIT 1').scalar()
+
+    assert client.delete(f'/artists/{artist_id}?soft=1').status_code == 200
+
+    venue = client.get('/api/v1/venues/1').get_json()
+    shows = venue['past_shows'] + venue['upcoming_shows']
+    assert all(x['artist_id'] != artist_id for x in shows)
+    assert venue['past_shows_count'] == len(venue['past_shows'])
+    assert venue['upcoming_shows_count'] == len(venue['upcoming_shows'])
+
+
+def test_exports_carry_soft_delete_tombstones(client, db, seed):
+    seed(venues=2, artists=1, shows=0)
+    assert client.delete('/venues/1?soft=1').status_code == 200
+
+    response = client.get('/export/venues?format=ndjson')
+    venues = [json.loads(x) for x in response.get_data(as_text=True).splitlines()]
+    assert [(x['id'], x['deleted_at'] is not None) for x in venues] == \
+        [(1, True), (2, False)]
+
+
+def test_soft_deleted_listings_reject_writes(app, client, db, seed, tmp_path):
+    from app import Artist, Show
+
+    seed(venues=2, artists=1, shows=0)
+    assert client.delete('/venues/1?soft=1').status_code == 200
+    venue = {
+        'name': 'Gone Hall', 'city': 'Austin', 'state': 'TX',
+        'address': '1 Main Street', 'genres': ['Jazz'], 'version': 2,
+        'facebook_link': 'https://www.facebook.com/gone',
+        'website': 'https://gone.example.com',
+    }
+
+    assert client.get('/venues/1/edit').status_code == 404
+    assert client.post('/venues/1/edit', data=venue).status_code == 404
+
+    response = client.post('/api/v1/venues/batch', json={'items': [
+        {'id': 1, 'name': 'Gone Hall'}, {'id': 2, 'name': 'Live Hall'}]})
+    assert [x['status'] for x in response.get_json()['results']] == \
+        ['not_found', 'updated']
+
+    artist_id = db.session.query(Artist.id).scalar()
+    response = client.post('/shows/create', data={
+        'venue_id': 1, 'artist_id': artist_id, 'start_time': '2030-01-01 20:00:00'})
+    assert b'does not exist' in response.data
+
+    path = tmp_path / 'shows.ndjson'
+    path.write_text(json.dumps({
+        'venue_id': 1, 'artist_id': artist_id, 'start_time': '2030-01-01 20:00:00'}))
+    result = app.test_cli_runner().invoke(args=['import-data', 'shows', str(path)])
+    assert 'line 1: unknown venue_id 1' in result.output
+
+    assert db.session.query(Show).count() == 0
+
+
+@pytest.mark.parametrize('filters', [{}, {'genre': 'Jazz'}])
+def test_calendar_counts_skip_soft_deleted_listings(client, db, seed, filters):
+    seed(venues=5, artists=10, shows=300, random_seed=2)
+    first = db.session.execute('SELECT min(start_time) FROM "Show"').scalar()
+    window = dict(filters, **{
+        'from': first.date().isoformat(),
+        'to': (first + timedelta(days=60)).date().isoformat()})
+    artist_id = db.session.execute(
+        'SELECT artist_id FROM "Show" GROUP BY artist_id '
+        'ORDER BY count(*) DESC LIMIT 1').scalar()
+
+    assert client.delete('/venues/1?soft=1').status_code == 200
+    assert client.delete(f'/artists/{artist_id}?soft=1').status_code == 200
+
+    days = client.get('/api/v1/calendar', query_string=window).get_json()['days']
+    counts = client.get('/api/v1/calendar/counts', query_string=window).get_json()
+    assert days
+    assert [(x['date'], x['count']) for x in counts['days']] == \
+        [(x['date'], len(x['shows'])) for x in days]
@@ -0,0 +1,16 @@
+import pytest
+
+from conftest import count_queries
+
+
+@pytest.mark.parametrize('path', ['/venues', '/api/v1/venues'])
+def test_venue_directory_query_count_is_fixed(client, seed, path):
+    seed(venues=5, artists=10, shows=20)
+    with count_queries() as small:
+        assert client.get(path).status_code == 200
+
+    seed(venues=50, artists=100, shows=500, random_seed=1)
+    with count_queries() as large:
+        assert client.get(path).status_code == 200
+
+    assert small and len(large) == len(small), large